@@ -1,59 +1,154 @@
+import json
 import os
 import tempfile
+import threading
+import time
 
 import dash_auth
 import dash_mantine_components as dmc
 from dash import Dash
-from flask import send_file
-from mlex_utils.mlflow_utils.mlflow_model_client import MLflowModelClient
+from flask import Response, jsonify, send_file, stream_with_context
 
-from callbacks.control_bar import *  # noqa: F403, F401
-from callbacks.image_viewer import *  # noqa: F403, F401
-from callbacks.infrastructure_check import *  # noqa: F403, F401
-from callbacks.segmentation import *  # noqa: F403, F401
-from components.control_bar import layout as control_bar_layout
-from components.image_viewer import layout as image_viewer_layout
+from utils.startup_timing import startup_timer
+
+# Backend clients are created on first use, so importing the callbacks does not connect
+with startup_timer.step("import callbacks"):
+    from callbacks.control_bar import *  # noqa: F403, F401
+    from callbacks.image_viewer import *  # noqa: F403, F401
+    from callbacks.infrastructure_check import *  # noqa: F403, F401
+    from callbacks.segmentation import *  # noqa: F403, F401
+    from callbacks.segmentation import job_poller
+    from components.control_bar import layout as control_bar_layout
+    from components.image_viewer import layout as image_viewer_layout
+    from utils.artifact_cache import ArtifactCache
+    from utils.backend_clients import get_mlflow_model_client
+    from utils.resilience import get_circuit_breaker_metrics
 
 USER_NAME = os.getenv("USER_NAME")
 USER_PASSWORD = os.getenv("USER_PASSWORD")
 
 VALID_USER_NAME_PASSWORD_PAIRS = {USER_NAME: USER_PASSWORD}
 
+# Local cache of MLflow artifacts, and how long browsers may cache served artifacts
+ARTIFACT_CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR") or os.path.join(
+    tempfile.gettempdir(), "mlflow-artifacts"
+)
+ARTIFACT_CACHE_SIZE_MB = float(os.getenv("ARTIFACT_CACHE_SIZE_MB", 1024))
+ARTIFACT_MAX_AGE = int(os.getenv("ARTIFACT_MAX_AGE", 7 * 24 * 3600))
+
+# Seconds between keep-alive comments on the job event stream, and until the stream
+# is closed (browsers reconnect automatically), such that server threads are freed up
+JOB_EVENTS_KEEPALIVE = float(os.getenv("JOB_EVENTS_KEEPALIVE", 15.0))
+JOB_EVENTS_MAX_AGE = float(os.getenv("JOB_EVENTS_MAX_AGE", 300.0))
+# Number of job event streams a worker process serves at a time, each of which holds
+# a server thread. Further tabs fall back to refreshing the job lists periodically.
+JOB_EVENTS_MAX_STREAMS = int(os.getenv("JOB_EVENTS_MAX_STREAMS", 16))
+job_event_streams = threading.BoundedSemaphore(JOB_EVENTS_MAX_STREAMS)
+
 app = Dash(__name__, update_title=None)
 server = app.server
 
-# Initialize MLflow client for serving artifacts
-mlflow_client = MLflowModelClient()
-
-# Set single user name password pair if deployment isn't local
-auth = (
-    dash_auth.BasicAuth(app, VALID_USER_NAME_PASSWORD_PAIRS)
-    if os.getenv("DASH_DEPLOYMENT_LOC", "") != "Local"
-    else None
+artifact_cache = ArtifactCache(
+    ARTIFACT_CACHE_DIR, int(ARTIFACT_CACHE_SIZE_MB * 1024**2)
 )
 
-app.layout = dmc.MantineProvider(
-    theme={"colorScheme": "light"},
-    children=[
-        control_bar_layout(),
-        image_viewer_layout(),
-    ],
-)
+with startup_timer.step("build layout"):
+    app.layout = dmc.MantineProvider(
+        theme={"colorScheme": "light"},
+        children=[
+            control_bar_layout(),
+            image_viewer_layout(),
+        ],
+    )
+startup_timer.print_report()
 
 
 @server.route("/mlflow-artifact/<run_id>/<path:artifact_path>")
 def serve_mlflow_artifact(run_id, artifact_path):
-    """Download and serve MLflow artifacts"""
+    """
+    Serve MLflow artifacts from the local artifact cache, downloading them on first access.
+    Run artifacts are immutable, so responses can be cached by the browser indefinitely,
+    and conditional and range requests are answered from the cached file.
+    """
     try:
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            downloaded_path = mlflow_client.client.download_artifacts(
+        cached_path, content_hash, created = artifact_cache.get(
+            run_id,
+            artifact_path,
+            lambda tmp_dir: get_mlflow_model_client().client.download_artifacts(
                 run_id, artifact_path, tmp_dir
-            )
-            return send_file(downloaded_path)
+            ),
+        )
+        response = send_file(
+            cached_path,
+            download_name=os.path.basename(artifact_path),
+            conditional=True,
+            etag=content_hash,
+            last_modified=created,
+            max_age=ARTIFACT_MAX_AGE,
+        )
+        response.cache_control.immutable = True
+        return response
     except Exception as e:
         print(f"Error loading MLflow artifact: {e}")
         return f"Error loading artifact: {str(e)}", 404
 
 
+@server.route("/metrics/circuit-breakers")
+def serve_circuit_breaker_metrics():
+    """Serve the state of the circuit breakers of all backend services"""
+    return jsonify(get_circuit_breaker_metrics())
+
+
+@server.route("/metrics/startup")
+def serve_startup_timing():
+    """Serve the durations of the startup steps of this worker process"""
+    return jsonify(startup_timer.get_report())
+
+
+@server.route("/job-events")
+def serve_job_events():
+    """
+    Stream changes of the job lists to the client as server-sent events,
+    or answer with 503 if JOB_EVENTS_MAX_STREAMS streams are open already
+    """
+    if not job_event_streams.acquire(blocking=False):
+        return "Too many open job event streams", 503
+    job_poller.start()
+
+    def stream_job_events():
+        change_seq = job_poller.get_change_seq()
+        opened_at = time.monotonic()
+        # Clients wait a few seconds before reconnecting
+        yield "retry: 5000\n\n"
+        while time.monotonic() - opened_at < JOB_EVENTS_MAX_AGE:
+            change_seq, changed_keys = job_poller.wait_for_change(
+                change_seq, timeout=JOB_EVENTS_KEEPALIVE
+            )
+            if changed_keys:
+                data = json.dumps({"seq": change_seq, "keys": changed_keys})
+                yield f"data: {data}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+
+    response = Response(
+        stream_with_context(stream_job_events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Also called if the client disconnects before the stream started
+    response.call_on_close(job_event_streams.release)
+    return response
+
+
+# Set single user name password pair if deployment isn't local.
+# dash_auth only protects the views that exist when it is created,
+# so this needs to follow the registration of all routes above.
+auth = (
+    dash_auth.BasicAuth(app, VALID_USER_NAME_PASSWORD_PAIRS)
+    if os.getenv("DASH_DEPLOYMENT_LOC", "") != "Local"
+    else None
+)
+
+
 if __name__ == "__main__":
     app.run_server(host="0.0.0.0", port=8075, debug=True)
@@ -28,7 +28,12 @@ from dash_iconify import DashIconify
 from components.annotation_class import annotation_class_item
 from components.parameter_items import ParameterItems
 from constants import ANNOT_ICONS, ANNOT_NOTIFICATION_MSGS, KEY_MODES, KEYBINDS
-from utils.annotations import Annotations
+from utils.annotations import (
+    Annotations,
+    build_annotated_slices_index,
+    get_annotated_slices,
+    get_slice_shapes,
+)
 from utils.data_utils import models, tiled_datasets, tiled_masks
 from utils.plot_utils import generate_notification, generate_notification_bg_icon_col
 
@@ -330,23 +335,31 @@ def annotation_color(
         {"type": "annotation-class-store", "index": ALL}, "data", allow_duplicate=True
     ),
     Output("image-viewer", "figure", allow_duplicate=True),
+    Output("annotated-slices-index", "data", allow_duplicate=True),
     Input("clear-all", "n_clicks"),
     Input("modal-cancel-delete-button", "n_clicks"),
     Input("modal-continue-delete-button", "n_clicks"),
     State("delete-all-warning", "opened"),
     State({"type": "annotation-class-store", "index": ALL}, "data"),
     State("image-selection-slider", "value"),
+    State("annotated-slices-index", "data"),
     prevent_initial_call=True,
 )
 def open_warning_modal(
-    delete, cancel_delete, continue_delete, opened, all_class_annotations, image_idx
+    delete,
+    cancel_delete,
+    continue_delete,
+    opened,
+    all_class_annotations,
+    image_idx,
+    annotated_slices_index,
 ):
     """
     This callback opens and closes the modal that warns you when you're deleting all annotations,
     and deletes all annotations on the current slice if the user confirms deletion.
     """
     if ctx.triggered_id in ["clear-all", "modal-cancel-delete-button"]:
-        return not opened, all_class_annotations, no_update
+        return not opened, all_class_annotations, no_update, no_update
     if ctx.triggered_id == "modal-continue-delete-button":
         image_idx = str(image_idx - 1)
         for a in all_class_annotations:
@@ -356,9 +369,15 @@ def open_warning_modal(
         # Update fig with patch so it looks like there are no more annotations without re-rerendering the image
         fig = Patch()
         fig["layout"]["shapes"] = []
-        return not opened, all_class_annotations, fig
+        # The current slice lost all of its shapes
+        if image_idx in annotated_slices_index:
+            patched_index = Patch()
+            del patched_index[image_idx]
+        else:
+            patched_index = no_update
+        return not opened, all_class_annotations, fig, patched_index
     else:
-        return no_update, all_class_annotations, no_update
+        return no_update, all_class_annotations, no_update, no_update
 
 
 @callback(
@@ -536,14 +555,12 @@ def re_draw_annotations_after_editing_class_color(
     """
     After editing a class color, the color is changed in the class-store, but the color change is not reflected
     on the image, so we must regenerate the annotations using Patch() so they show up in the right color.
+    Stored shapes do not hold colors, so only the shapes on the current slice are restyled.
     """
     fig = Patch()
-    image_idx = str(image_idx - 1)
-    all_annotations = []
-    for a in all_annotation_class_store:
-        if a["is_visible"] and "annotations" in a and image_idx in a["annotations"]:
-            all_annotations += a["annotations"][image_idx]
-    fig["layout"]["shapes"] = all_annotations
+    fig["layout"]["shapes"] = get_slice_shapes(
+        all_annotation_class_store, str(image_idx - 1)
+    )
     return fig
 
 
@@ -556,15 +573,16 @@ def re_draw_annotations_after_editing_class_color(
     Input({"type": "save-edited-annotation-class-btn", "index": MATCH}, "n_clicks"),
     State({"type": "edit-annotation-class-text-input", "index": MATCH}, "value"),
     State({"type": "edit-annotation-class-colorpicker", "index": MATCH}, "value"),
-    State({"type": "annotation-class-store", "index": MATCH}, "data"),
     prevent_initial_call=True,
 )
-def edit_annotation_class(edit_clicked, new_label, new_color, annotation_class_store):
+def edit_annotation_class(edit_clicked, new_label, new_color):
     """
     This callback edits the name and color of an annotation class by updating class-store metadata. We also trigger
     edit-class-store so we can then redraw the annotations in re_draw_annotations_after_editing_class_color().
+    Stored shapes reference their class by id, so only the class metadata needs to be patched.
     """
     # update store meta data
+    annotation_class_store = Patch()
     annotation_class_store["label"] = new_label
     annotation_class_store["color"] = new_color
     class_color_identifier = {
@@ -575,13 +593,6 @@ def edit_annotation_class(edit_clicked, new_label, new_color, annotation_class_s
         "borderRadius": "3px",
         "border": f"2px solid {new_color}",
     }
-    # update color in previous annotation data
-    for img_idx, annots in annotation_class_store["annotations"].items():
-        for annots in annotation_class_store["annotations"][img_idx]:
-            annots["line"]["color"] = new_color
-            if "fillcolor" in annots:
-                annots["fillcolor"] = new_color
-
     return new_label, class_color_identifier, annotation_class_store, 1, True
 
 
@@ -624,12 +635,9 @@ def hide_show_annotations_on_fig(
 ):
     """This callback hides or shows all annotations for a given class by Patching the figure accordingly"""
     fig = Patch()
-    image_idx = str(image_idx - 1)
-    all_annotations = []
-    for a in all_annotation_class_store:
-        if a["is_visible"] and "annotations" in a and image_idx in a["annotations"]:
-            all_annotations += a["annotations"][image_idx]
-    fig["layout"]["shapes"] = all_annotations
+    fig["layout"]["shapes"] = get_slice_shapes(
+        all_annotation_class_store, str(image_idx - 1)
+    )
     return fig
 
 
@@ -640,22 +648,22 @@ def hide_show_annotations_on_fig(
     Output({"type": "hide-show-class-store", "index": MATCH}, "data"),
     Output({"type": "hide-annotation-class", "index": MATCH}, "children"),
     Input({"type": "hide-annotation-class", "index": MATCH}, "n_clicks"),
-    State({"type": "annotation-class-store", "index": MATCH}, "data"),
     State({"type": "hide-show-class-store", "index": MATCH}, "data"),
     prevent_initial_call=True,
 )
 def hide_show_annotation_class(
     hide_show_click,
-    annotation_class_store,
     hide_show_class_store,
 ):
     """
     This callback updates both the annotation-class-store (which contains the annotation data)
     and the hide-show-class-store which is only used to trigger the callback that will
     actually patch the figure: hide_show_annotations_on_fig().
+    Only the visibility flag of the annotation-class-store is patched.
     Also updates the hide/show icon accordingly.
     """
-    is_visible = annotation_class_store["is_visible"]
+    is_visible = hide_show_class_store["is_visible"]
+    annotation_class_store = Patch()
     annotation_class_store["is_visible"] = not is_visible
     hide_show_class_store["is_visible"] = not is_visible
     if is_visible:
@@ -667,20 +675,30 @@ def hide_show_annotation_class(
 
 @callback(
     Output("annotation-class-container", "children"),
+    Output("annotated-slices-index", "data", allow_duplicate=True),
     Input({"type": "deleted-class-store", "index": ALL}, "data"),
     State("annotation-class-container", "children"),
+    State("annotated-slices-index", "data"),
     prevent_initial_call=True,
 )
-def delete_annotation_class(is_deleted, all_classes):
-    """This callback deletes the class from memory using the color from the deleted-class-store"""
+def delete_annotation_class(is_deleted, all_classes, annotated_slices_index):
+    """
+    This callback deletes the class from memory using the color from the deleted-class-store,
+    and removes the shape counts of that class from the annotated slices index
+    """
     is_deleted = [x for x in is_deleted if x is not None]
     if is_deleted:
         is_deleted = is_deleted[0]
         updated_classes = [
             c for c in all_classes if c["props"]["id"]["index"] != is_deleted
         ]
-        return updated_classes
-    return no_update
+        updated_index = {}
+        for image_idx, class_counts in annotated_slices_index.items():
+            class_counts.pop(str(is_deleted), None)
+            if class_counts:
+                updated_index[image_idx] = class_counts
+        return updated_classes, updated_index
+    return no_update, no_update
 
 
 @callback(
@@ -740,12 +758,17 @@ clientside_callback(
     Input("export-annotation", "n_clicks"),
     State({"type": "annotation-class-store", "index": ALL}, "data"),
     State("annotation-store", "data"),
+    State("annotated-slices-index", "data"),
     prevent_initial_call=True,
 )
-def export_annotation(n_clicks, all_annotations, global_store):
+def export_annotation(n_clicks, all_annotations, global_store, annotated_slices_index):
 
     image_shape = global_store["image_shapes"][0]
-    annotations = Annotations(all_annotations, image_shape)
+    annotations = Annotations(
+        all_annotations,
+        image_shape,
+        annotated_slices=get_annotated_slices(annotated_slices_index),
+    )
     EXPORT_AS_SPARSE = False  # todo replace with input
 
     if annotations.has_annotations():
@@ -862,6 +885,7 @@ def populate_load_annotations_dropdown_menu_options(modal_opened, image_uri):
 @callback(
     Output("annotation-class-container", "children", allow_duplicate=True),
     Output("data-management-modal", "opened", allow_duplicate=True),
+    Output("annotated-slices-index", "data", allow_duplicate=True),
     Input({"type": "load-server-annotations", "index": ALL}, "n_clicks"),
     State("image-uri", "value"),
     State("image-selection-slider", "value"),
@@ -892,7 +916,77 @@ def load_and_apply_selected_annotations(selected_annotation, image_uri, img_idx)
     for annotation_class in data:
         annotations.append(annotation_class_item(None, None, None, annotation_class))
 
-    return annotations, False
+    return annotations, False, build_annotated_slices_index(data)
+
+
+@callback(
+    Output("load-annotations-mask-container", "children"),
+    Input("open-data-management-modal-button", "n_clicks"),
+    State("image-uri", "value"),
+    prevent_initial_call=True,
+)
+def populate_load_annotations_from_mask_options(modal_opened, image_uri):
+    """
+    This callback lists the masks saved in Tiled for the given project name.
+    It then creates buttons with info about the mask, which when clicked, imports the mask as annotations.
+    """
+    if not modal_opened:
+        raise PreventUpdate
+
+    saved_masks = tiled_masks.get_saved_masks(image_uri)
+    if not saved_masks:
+        return "No saved masks found for the selected data source."
+
+    buttons = []
+    for mask_key, metadata in saved_masks:
+        num_classes = len(metadata.get("classes", {}))
+        num_slices = len(metadata.get("mask_idx", []))
+        buttons.append(
+            dmc.Button(
+                f"{num_classes} classes, {num_slices} slices ({mask_key[:8]})",
+                id={"type": "load-mask-annotations", "index": mask_key},
+                variant="light",
+            )
+        )
+
+    return dmc.Stack(
+        buttons,
+        spacing="xs",
+        style={"overflow": "auto", "max-height": "300px"},
+    )
+
+
+@callback(
+    Output("annotation-class-container", "children", allow_duplicate=True),
+    Output("data-management-modal", "opened", allow_duplicate=True),
+    Output("annotated-slices-index", "data", allow_duplicate=True),
+    Output("notifications-container", "children", allow_duplicate=True),
+    Input({"type": "load-mask-annotations", "index": ALL}, "n_clicks"),
+    State("image-uri", "value"),
+    prevent_initial_call=True,
+)
+def load_annotations_from_mask(selected_mask, image_uri):
+    """
+    This callback imports a mask saved in Tiled as annotations, by vectorizing each mask slice
+    into closed paths per class and populating the class stores with them.
+    """
+    # this callback is triggered when the buttons are created, when that happens we can stop it
+    if all([x is None for x in selected_mask]):
+        raise PreventUpdate
+
+    mask_key = ctx.triggered_id["index"]
+    data, message = tiled_masks.load_annotations_from_mask(image_uri, mask_key)
+    if data is None:
+        notification = generate_notification(
+            "Load Mask", "red", ANNOT_ICONS["export"], message
+        )
+        return no_update, no_update, no_update, notification
+
+    annotations = []
+    for annotation_class in data:
+        annotations.append(annotation_class_item(None, None, None, annotation_class))
+
+    return annotations, False, build_annotated_slices_index(data), no_update
 
 
 @callback(
@@ -942,22 +1036,46 @@ def update_result_controls(toggle, seg_result_train, seg_result_inference):
 @callback(
     Output("annotated-slices-selector", "data"),
     Output("annotated-slices-selector", "disabled"),
-    Input({"type": "annotation-class-store", "index": ALL}, "data"),
-    # TODO check if erasing an annotation via the erase triggers this CB (it should)
+    Input("annotated-slices-index", "data"),
+    State("annotated-slices-selector", "data"),
 )
-def update_current_annotated_slices_values(all_classes):
-    all_annotated_slices = []
-    for a in all_classes:
-        all_annotated_slices += list(a["annotations"].keys())
-    all_annotated_slices = sorted(list(set(all_annotated_slices)))
+def update_current_annotated_slices_values(annotated_slices_index, current_values):
+    """
+    Populates the annotated slices dropdown from the annotated slices index.
+    The index is patched whenever shape counts on a slice change, but the dropdown only
+    needs to be updated when a slice gained its first or lost its last shape.
+    """
     dropdown_values = [
         {"value": int(slice) + 1, "label": f"Slice {str(int(slice) + 1)}"}
-        for slice in all_annotated_slices
+        for slice in get_annotated_slices(annotated_slices_index)
     ]
+    if dropdown_values == current_values:
+        raise PreventUpdate
     disabled = True if len(dropdown_values) == 0 else False
     return dropdown_values, disabled
 
 
+@callback(
+    Output("model-list", "data"),
+    Output("model-list", "value"),
+    Input("model-check", "n_intervals"),
+    State("model-list", "data"),
+    State("model-list", "value"),
+)
+def update_model_list(n_intervals, current_model_names, model_name):
+    """
+    Updates the list of models once the model definitions were refreshed from MLflow
+    """
+    model_names = models.modelname_list
+    if model_names == current_model_names:
+        raise PreventUpdate
+    if model_name not in model_names:
+        model_name = model_names[0] if len(model_names) > 0 else None
+    else:
+        model_name = no_update
+    return model_names, model_name
+
+
 @callback(
     Output("model-parameters", "children"),
     Input("model-list", "value"),
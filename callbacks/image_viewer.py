@@ -16,13 +16,20 @@ from dash import (
 from dash.exceptions import PreventUpdate
 
 from constants import ANNOT_ICONS, ANNOT_NOTIFICATION_MSGS, KEYBINDS
-from utils.data_utils import tiled_datasets, tiled_results
+from utils.annotations import (
+    count_slice_annotations,
+    get_slice_shapes,
+    simplify_closed_path,
+    strip_shape_style,
+)
+from utils.data_utils import segmentation_results, tiled_datasets
 from utils.plot_utils import (
     create_viewfinder,
     downscale_view,
     generate_notification,
     generate_segmentation_colormap,
     get_view_finder_max_min,
+    normalize_to_uint8,
     resize_canvas,
 )
 
@@ -89,11 +96,10 @@ def render_image(
     result = None
     if image_idx:
         image_idx -= 1  # slider starts at 1, so subtract 1 to get the correct index
-        tf = tiled_datasets.get_data_sequence_by_trimmed_uri(image_uri)[image_idx]
+        tf = tiled_datasets.get_data_sequence_slice(image_uri, image_idx)
+        tiled_datasets.prefetch_data_sequence_slices(image_uri, image_idx)
         # Auto-scale data
-        low = np.percentile(tf.ravel(), 1)
-        high = np.percentile(tf.ravel(), 99)
-        tf = np.clip((tf - low) / (high - low), 0, 1)
+        tf = normalize_to_uint8(tf)
 
         # Segmentation result stores are only populated when they fit with the current image_uri
         if seg_result_train or seg_result_inference:
@@ -101,26 +107,14 @@ def render_image(
                 seg_result_inference if seg_result_inference else seg_result_train
             )
 
-            if "mask_idx" in seg_result and seg_result["mask_idx"] is not None:
-                annotation_indices = seg_result["mask_idx"]
-                if image_idx in annotation_indices:
-                    # Will not return an error since we already checked if image_idx is in the list
-                    mapped_index = annotation_indices.index(image_idx)
-                    result = tiled_results.get_data_slice_by_trimmed_uri(
-                        seg_result["seg_result_trimmed_uri"], slice=mapped_index
-                    )
-                else:
-                    result = None
-            # if mask_idx is not given in the results,
-            # then the result stems from inference on the full data set
-            else:
-                result = tiled_results.get_data_slice_by_trimmed_uri(
-                    seg_result["seg_result_trimmed_uri"], slice=image_idx
-                )
+            # Class ids of the result are shifted by one, with 0 for unlabeled pixels
+            result = segmentation_results.get_result_slice(seg_result, image_idx)
+            segmentation_results.prefetch_result_slices(seg_result, image_idx)
     else:
-        tf = np.zeros((500, 500))
+        tf = np.zeros((500, 500), dtype=np.uint8)
 
-    fig = px.imshow(tf, binary_string=True)
+    # uint8 images are encoded without any further rescaling
+    fig = px.imshow(tf, binary_string=True, contrast_rescaling="infer")
     if result is not None:
         colorscale, max_class_id = generate_segmentation_colormap(
             all_annotation_class_store
@@ -128,8 +122,8 @@ def render_image(
         fig.add_trace(
             go.Heatmap(
                 z=result,
-                zmin=-1.5,
-                zmax=max_class_id + 0.5,
+                zmin=-0.5,
+                zmax=max_class_id + 1.5,
                 colorscale=colorscale,
                 showscale=False,
             )
@@ -150,12 +144,9 @@ def render_image(
     view = None
     if annotation_store:
         fig["layout"]["dragmode"] = annotation_store["dragmode"]
-        all_annotations = []
-        for a_class in all_annotation_class_store:
-            if str(image_idx) in a_class["annotations"] and a_class["is_visible"]:
-                all_annotations += a_class["annotations"][str(image_idx)]
-
-        fig["layout"]["shapes"] = all_annotations
+        fig["layout"]["shapes"] = get_slice_shapes(
+            all_annotation_class_store, str(image_idx)
+        )
         view = annotation_store["view"]
 
     if screen_size:
@@ -207,12 +198,16 @@ def render_image(
     Output("notifications-container", "children", allow_duplicate=True),
     Input("annotated-slices-selector", "value"),
     State("image-selection-slider", "value"),
+    State("annotated-slices-index", "data"),
     prevent_initial_call=True,
 )
-def jump_to_annotated_slice(new_image_idx, current_image_idx):
+def jump_to_annotated_slice(new_image_idx, current_image_idx, annotated_slices_index):
     if new_image_idx == current_image_idx:
         # Already on the selected slice, only reset the selector
         return dash.no_update, None, dash.no_update
+    if new_image_idx is None or str(new_image_idx - 1) not in annotated_slices_index:
+        # The slice lost its last annotation since the options were populated
+        return dash.no_update, None, dash.no_update
     notification = generate_notification(
         f"{ANNOT_NOTIFICATION_MSGS['slice-jump']} {new_image_idx}",
         "indigo",
@@ -400,20 +395,29 @@ clientside_callback(
     ),
     Output("annotation-store", "data", allow_duplicate=True),
     Output("image-viewer", "figure", allow_duplicate=True),
+    Output("annotated-slices-index", "data", allow_duplicate=True),
     Input("image-viewer", "relayoutData"),
     State("image-selection-slider", "value"),
     State("annotation-store", "data"),
     State({"type": "annotation-class-store", "index": ALL}, "data"),
     State("image-viewer", "figure"),
+    State("annotated-slices-index", "data"),
     prevent_initial_call=True,
 )
 def locally_store_annotations(
-    relayout_data, img_idx, annotation_store, all_annotation_class_store, fig
+    relayout_data,
+    img_idx,
+    annotation_store,
+    all_annotation_class_store,
+    fig,
+    annotated_slices_index,
 ):
     """
     Upon finishing a relayout event (drawing, modifying, panning or zooming), this function takes the
     currently drawn shapes or zoom/pan data, and stores the lastest added shape to the
     appropriate class-annotation-store, or the image pan/zoom position to the anntations-store.
+    The annotated slices index is only patched for the current slice, and only if its
+    shape counts changed.
     """
     img_idx = str(img_idx - 1)
     shapes = []
@@ -423,7 +427,12 @@ def locally_store_annotations(
         annotation_store["view"]["xaxis_range_1"] = relayout_data["xaxis.range[1]"]
         annotation_store["view"]["yaxis_range_0"] = relayout_data["yaxis.range[0]"]
         annotation_store["view"]["yaxis_range_1"] = relayout_data["yaxis.range[1]"]
-        return all_annotation_class_store, annotation_store, dash.no_update
+        return (
+            all_annotation_class_store,
+            annotation_store,
+            dash.no_update,
+            dash.no_update,
+        )
     # Case 2: A shape is modified, drawn or deleted. Save all the current shapes on the fig layout, which includes new
     # modified, and deleted shapes.
     if (
@@ -441,8 +450,20 @@ def locally_store_annotations(
             del a_class["annotations"][img_idx]
     # Add back each annotation on the current slice in each respective store.
     for shape in shapes:
+        # Newly drawn freeform paths arrive with one vertex per mouse event, simplify them
+        # before storing. Stored and imported paths carry their class id as name and are
+        # left unchanged, as simplifying them again would erode their outlines.
+        if shape["type"] == "path" and "name" not in shape:
+            shape["path"] = simplify_closed_path(shape["path"])
         for a_class in all_annotation_class_store:
-            if a_class["color"] == shape["line"]["color"]:
+            # Shapes that were already stored reference their class by id,
+            # newly drawn shapes carry the color of the currently selected class
+            if "name" in shape:
+                is_shape_class = shape["name"] == str(a_class["class_id"])
+            else:
+                is_shape_class = a_class["color"] == shape["line"]["color"]
+            if is_shape_class:
+                shape = strip_shape_style(shape, a_class["class_id"])
                 if img_idx in a_class["annotations"]:
                     a_class["annotations"][img_idx].append(shape)
                 else:
@@ -452,18 +473,25 @@ def locally_store_annotations(
     # ie: drawing with a hidden class hides the shape immediately
     # ie: drawing with the first class pushes the shape to the back of the image imdediately
     fig = Patch()
-    all_annotations = []
-    for a in all_annotation_class_store:
-        if a["is_visible"] and "annotations" in a and img_idx in a["annotations"]:
-            all_annotations += a["annotations"][img_idx]
-    fig["layout"]["shapes"] = all_annotations
-    return all_annotation_class_store, annotation_store, fig
+    fig["layout"]["shapes"] = get_slice_shapes(all_annotation_class_store, img_idx)
+
+    slice_counts = count_slice_annotations(all_annotation_class_store, img_idx)
+    if slice_counts == annotated_slices_index.get(img_idx, {}):
+        patched_index = dash.no_update
+    else:
+        patched_index = Patch()
+        if slice_counts:
+            patched_index[img_idx] = slice_counts
+        else:
+            del patched_index[img_idx]
+    return all_annotation_class_store, annotation_store, fig, patched_index
 
 
 @callback(
     Output(
         {"type": "annotation-class-store", "index": ALL}, "data", allow_duplicate=True
     ),
+    Output("annotated-slices-index", "data", allow_duplicate=True),
     Input("image-uri", "value"),
     State({"type": "annotation-class-store", "index": ALL}, "data"),
     prevent_initial_call=True,
@@ -475,7 +503,7 @@ def clear_annotations_on_dataset_change(change_project, all_annotation_class_sto
     """
     for a in all_annotation_class_store:
         a["annotations"] = {}
-    return all_annotation_class_store
+    return all_annotation_class_store, {}
 
 
 @callback(
@@ -1,20 +1,58 @@
 import os
-from datetime import datetime
 
-import pytz
 from dash import Input, Output, callback, no_update
-from mlex_utils.mlflow_utils.mlflow_model_client import MLflowModelClient
 from mlex_utils.prefect_utils.core import (
     check_prefect_ready,
     check_prefect_worker_ready,
 )
 
 from components.control_bar import create_infra_state_details
+from utils.backend_clients import get_mlflow_model_client
 from utils.data_utils import tiled_datasets, tiled_masks, tiled_results
+from utils.infra_prober import InfraStateProber
 from utils.plot_utils import generate_notification
 
 TIMEZONE = os.getenv("TIMEZONE", "US/Pacific")
 FLOW_NAME = os.getenv("FLOW_NAME", "")
+INFRA_CHECK_INTERVAL = float(os.getenv("INFRA_CHECK_INTERVAL", 60))
+INFRA_PROBE_TIMEOUT = float(os.getenv("INFRA_PROBE_TIMEOUT", 5))
+
+
+def _check_prefect_ready():
+    check_prefect_ready()
+    return True
+
+
+def _check_prefect_worker_ready():
+    check_prefect_worker_ready(FLOW_NAME)
+    return True
+
+
+def _check_mlflow_ready():
+    return get_mlflow_model_client().check_mlflow_ready()
+
+
+# Checks run in a background thread shared by all sessions of this process,
+# with short timeouts so that one unreachable component does not delay the others
+infra_prober = InfraStateProber(
+    {
+        # Tiled: Check if data, masks, and results are reachable (from_uri did not raise an exception)
+        "tiled_data_ready": tiled_datasets.check_dataloader_ready,
+        "tiled_masks_ready": tiled_masks.check_mask_handler_ready,
+        # The segmentation application will make sure that all containers that are needed exist
+        "tiled_results_ready": lambda: tiled_results.check_dataloader_ready(
+            base_uri_only=True
+        ),
+        # Prefect: Check prefect API is reachable, and the worker is ready (flow is deployed and ready)
+        "prefect_ready": _check_prefect_ready,
+        "prefect_worker_ready": _check_prefect_worker_ready,
+        # MLFLOW: Check MLFlow is reachable
+        "mlflow_ready": _check_mlflow_ready,
+    },
+    interval=INFRA_CHECK_INTERVAL,
+    timeout=INFRA_PROBE_TIMEOUT,
+    timezone=TIMEZONE,
+)
 
 
 @callback(
@@ -23,56 +61,14 @@ FLOW_NAME = os.getenv("FLOW_NAME", "")
     prevent_initial_call="initial_dupulicate",
 )
 def check_infra_state(n_intervals):
-    infra_state = {}
-
-    current_time = datetime.now(pytz.timezone(TIMEZONE)).strftime("%Y/%m/%d %H:%M:%S")
-    infra_state["last_checked"] = current_time
-
-    any_infra_down = False
-
-    # Tiled: Check if data, masks, and results are reachable (from_uri did not raise an exception)
-    tiled_data_ready = tiled_datasets.check_dataloader_ready()
-    infra_state["tiled_data_ready"] = tiled_data_ready
-    if not tiled_data_ready:
-        any_infra_down = True
-    tiled_masks_ready = tiled_masks.check_mask_handler_ready()
-    infra_state["tiled_masks_ready"] = tiled_masks_ready
-    if not tiled_masks_ready:
-        any_infra_down = True
-    # The segmentation application will make sure that all containers that are needed exist
-    tiled_results_ready = tiled_results.check_dataloader_ready(base_uri_only=True)
-    infra_state["tiled_results_ready"] = tiled_results_ready
-    if not tiled_results_ready:
-        any_infra_down = True
-
-    # Prefect: Check prefect API is reachable, and the worker is ready (flow is deployed and ready)
-    try:
-        check_prefect_ready()
-        infra_state["prefect_ready"] = True
-    except Exception:
-        any_infra_down = True
-        infra_state["prefect_ready"] = False
-    try:
-        check_prefect_worker_ready(FLOW_NAME)
-        infra_state["prefect_worker_ready"] = True
-    except Exception:
-        any_infra_down = True
-        infra_state["prefect_worker_ready"] = False
-
-    # MLFLOW: Check MLFlow is reachable
-    try:
-        mlflow_client = MLflowModelClient()
-        infra_state["mlflow_ready"] = mlflow_client.check_mlflow_ready()
-        if not infra_state["mlflow_ready"]:
-            any_infra_down = True
-    except Exception:
-        any_infra_down = True
-        infra_state["mlflow_ready"] = False
-
-    if any_infra_down:
-        infra_state["any_infra_down"] = True
-    else:
-        infra_state["any_infra_down"] = False
+    """
+    Returns the latest snapshot of the infra state from the background prober,
+    no checks are run within this callback
+    """
+    infra_state = infra_prober.get_state()
+    if infra_state is None:
+        # The first round of checks has not completed yet
+        return no_update
     return infra_state
 
 
@@ -1,19 +1,28 @@
 import os
+import tempfile
+import threading
+import time
 import traceback
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 
+import dash_mantine_components as dmc
 import pytz
-from dash import ALL, Input, Output, Patch, State, callback, no_update
-from mlex_utils.mlflow_utils.mlflow_model_client import MLflowModelClient
+from dash import ALL, Input, Output, Patch, State, callback, html, no_update
 from mlex_utils.prefect_utils.core import (
     get_children_flow_run_ids,
     get_flow_run_name,
+    get_flow_run_state,
     query_flow_runs,
     schedule_prefect_flow,
 )
 
 from constants import ANNOT_ICONS
+from utils.annotations import get_annotated_slices
+from utils.backend_clients import get_mlflow_model_client
+from utils.batch_inference import collect_dataset_uris, schedule_per_dataset
 from utils.data_utils import (
     assemble_io_parameters_from_uris,
     extract_parameters_from_html,
@@ -21,7 +30,11 @@ from utils.data_utils import (
     tiled_masks,
     tiled_results,
 )
+from utils.finished_jobs import FinishedJobCache
+from utils.job_poller import JobPoller
+from utils.job_submissions import JobSubmissionManager
 from utils.plot_utils import generate_notification
+from utils.resilience import resilient_call
 
 MODE = os.getenv("MODE", "")
 FLOW_NAME = os.getenv("FLOW_NAME", "")
@@ -32,13 +45,100 @@ MLFLOW_URI = os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
 # TODO: Retrieve timezone from browser
 TIMEZONE = os.getenv("TIMEZONE", "US/Pacific")
 
-# Initialize MLflow client
-mlflow_client = MLflowModelClient()
+# Seconds until training jobs without a registered model are looked up again in MLflow,
+# and the number of training jobs whose MLflow runs are resolved in the background
+MLFLOW_RUN_ID_NEGATIVE_TTL = float(os.getenv("MLFLOW_RUN_ID_NEGATIVE_TTL", 60.0))
+MLFLOW_WARMUP_JOBS = int(os.getenv("MLFLOW_WARMUP_JOBS", 20))
+
+# Seconds between refreshes of the job lists shared by all sessions
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 5.0))
+# Seconds until the job lists of closed tabs are no longer polled, which needs to exceed
+# the interval of the model-check fallback, such that open tabs keep their job lists
+JOB_POLL_IDLE_TIMEOUT = float(os.getenv("JOB_POLL_IDLE_TIMEOUT", 300.0))
+# Number of job submissions (mask export and flow scheduling) that run concurrently
+JOB_SUBMISSION_WORKERS = int(os.getenv("JOB_SUBMISSION_WORKERS", 4))
+# Directory of the job submission statuses, shared by all worker processes of the app
+JOB_SUBMISSION_DIR = os.getenv("JOB_SUBMISSION_DIR") or os.path.join(
+    tempfile.gettempdir(), "job-submissions"
+)
+# Number of datasets that are resolved or scheduled at a time in batch inference,
+# and the maximum number of datasets of one batch
+BATCH_INFERENCE_CONCURRENCY = int(os.getenv("BATCH_INFERENCE_CONCURRENCY", 4))
+BATCH_INFERENCE_MAX_DATASETS = int(os.getenv("BATCH_INFERENCE_MAX_DATASETS", 200))
+# Number of finished jobs whose children flows and result metadata are cached
+FINISHED_JOB_CACHE_SIZE = int(os.getenv("FINISHED_JOB_CACHE_SIZE", 256))
+
+# Every worker process of the app runs its own poller, such that Prefect is queried
+# once per interval and worker for each job list
+job_poller = JobPoller(interval=JOB_POLL_INTERVAL, idle_timeout=JOB_POLL_IDLE_TIMEOUT)
+job_submissions = JobSubmissionManager(
+    JOB_SUBMISSION_DIR, max_workers=JOB_SUBMISSION_WORKERS
+)
+
+
+def _submission_result(
+    title, color, message, icon="submit", details=None, model_parameters=None
+):
+    """
+    Result of a job submission, which is stored as JSON and shown as a notification by
+    check_job_submission. Details are (text, color) pairs listed below the message.
+    """
+    return {
+        "title": title,
+        "color": color,
+        "icon": icon,
+        "message": message,
+        "details": details or [],
+        "model_parameters": model_parameters,
+    }
+
+
+def _submission_notification(result):
+    """
+    Builds the notification of the result of a job submission
+    """
+    message = result["message"]
+    if result["details"]:
+        message = html.Div(
+            [dmc.Text(message)]
+            + [
+                dmc.Text(text, size="xs", color=color)
+                for text, color in result["details"]
+            ]
+        )
+    return generate_notification(
+        result["title"], result["color"], ANNOT_ICONS[result["icon"]], message
+    )
+
+
+def _job_submission_outputs(submission_id, label):
+    """
+    Outputs of a callback that started a job submission, which show its progress
+    """
+    return (
+        {"id": submission_id, "label": label},
+        False,
+        0,
+        f"{label}: waiting for submission...",
+        {"display": "block"},
+        False,
+        True,
+        True,
+        True,
+    )
 
 
 @callback(
     Output("notifications-container", "children", allow_duplicate=True),
-    Output("model-parameter-values", "data"),
+    Output("job-submission", "data", allow_duplicate=True),
+    Output("job-submission-check", "disabled", allow_duplicate=True),
+    Output("job-submission-progress", "value", allow_duplicate=True),
+    Output("job-submission-message", "children", allow_duplicate=True),
+    Output("job-submission-status", "style", allow_duplicate=True),
+    Output("cancel-job-submission", "disabled", allow_duplicate=True),
+    Output("run-train", "disabled", allow_duplicate=True),
+    Output("run-inference", "disabled", allow_duplicate=True),
+    Output("run-batch-inference", "disabled", allow_duplicate=True),
     Input("run-train", "n_clicks"),
     State("annotation-store", "data"),
     State({"type": "annotation-class-store", "index": ALL}, "data"),
@@ -46,6 +146,7 @@ mlflow_client = MLflowModelClient()
     State("model-parameters", "children"),
     State("model-list", "value"),
     State("job-name", "value"),
+    State("annotated-slices-index", "data"),
     prevent_initial_call=True,
 )
 def run_train(
@@ -56,9 +157,11 @@ def run_train(
     model_parameter_container,
     model_name,
     job_name,
+    annotated_slices_index,
 ):
     """
-    This callback collects parameters from the UI and submits a training job to Prefect.
+    This callback collects parameters from the UI and starts the submission of a training
+    job to Prefect in the background, the progress of which is shown by check_job_submission.
     If the app is run from "dev" mode, then only a placeholder job_uid will be created.
 
     """
@@ -74,91 +177,136 @@ def run_train(
                 ANNOT_ICONS["parameters"],
                 "Model parameters are not valid!",
             )
-            return notification, no_update
-        mask_uri, num_classes, mask_error_message = tiled_masks.save_annotations_data(
-            global_store, all_annotations, image_uri
+            return (notification,) + (no_update,) * 9
+        submission_id = job_submissions.submit(
+            _submit_train_job,
+            global_store,
+            all_annotations,
+            image_uri,
+            model_parameters,
+            model_name,
+            job_name,
+            get_annotated_slices(annotated_slices_index),
+            total_steps=3,
         )
-        model_parameters["num_classes"] = num_classes
-        model_parameters["network"] = model_name
+        return (no_update,) + _job_submission_outputs(submission_id, "Training")
+    return (no_update,) * 10
 
-        if mask_uri is None:
-            notification = generate_notification(
-                "Mask Export", "red", ANNOT_ICONS["export"], mask_error_message
-            )
-            return notification, model_parameters
-
-        # Set io_parameters for both training and partial inference
-        # Uid retrieve is set to None because the partial inference job will be
-        # populated with the uid_save of the training job
-        # This is handled in the Prefect worker
-        current_time = datetime.now(pytz.timezone(TIMEZONE)).strftime(
-            "%Y/%m/%d %H:%M:%S"
+
+def _submit_train_job(
+    progress,
+    global_store,
+    all_annotations,
+    image_uri,
+    model_parameters,
+    model_name,
+    job_name,
+    annotated_slices,
+):
+    """
+    Exports the annotation mask to Tiled and schedules the training flow.
+    Returns the result of the submission, including the model parameters that were used.
+    """
+    progress(1, "Rasterizing annotations...")
+    mask_uri, num_classes, mask_error_message = tiled_masks.save_annotations_data(
+        global_store,
+        all_annotations,
+        image_uri,
+        annotated_slices=annotated_slices,
+        progress=partial(progress, 2),
+    )
+    model_parameters["num_classes"] = num_classes
+    model_parameters["network"] = model_name
+
+    if mask_uri is None:
+        return _submission_result(
+            "Mask Export",
+            "red",
+            mask_error_message,
+            icon="export",
+            model_parameters=model_parameters,
         )
-        flow_run_name = f"{job_name} {current_time}"
-        data_uri = tiled_datasets.get_data_uri_by_trimmed_uri(image_uri)
-        io_parameters = assemble_io_parameters_from_uris(data_uri, mask_uri)
-        io_parameters["uid_retrieve"] = ""
-        io_parameters["job_name"] = flow_run_name
-
-        # NEW: Add MLflow parameters
-        io_parameters["mlflow_uri"] = MLFLOW_URI
-        io_parameters["mlflow_model"] = None
-
-        # Simplified params - only send model_name, task_name, and parameters
-        # The Prefect worker will fetch algorithm details from MLflow
-        TRAIN_PARAMS_EXAMPLE = {
-            "params_list": [
-                {
-                    "model_name": model_name,
-                    "task_name": "train",
-                    "params": {
-                        "io_parameters": io_parameters,
-                        "model_parameters": model_parameters,
-                    },
+
+    # Set io_parameters for both training and partial inference
+    # Uid retrieve is set to None because the partial inference job will be
+    # populated with the uid_save of the training job
+    # This is handled in the Prefect worker
+    current_time = datetime.now(pytz.timezone(TIMEZONE)).strftime("%Y/%m/%d %H:%M:%S")
+    flow_run_name = f"{job_name} {current_time}"
+    data_uri = tiled_datasets.get_data_uri_by_trimmed_uri(image_uri)
+    io_parameters = assemble_io_parameters_from_uris(data_uri, mask_uri)
+    io_parameters["uid_retrieve"] = ""
+    io_parameters["job_name"] = flow_run_name
+
+    # NEW: Add MLflow parameters
+    io_parameters["mlflow_uri"] = MLFLOW_URI
+    io_parameters["mlflow_model"] = None
+
+    # Simplified params - only send model_name, task_name, and parameters
+    # The Prefect worker will fetch algorithm details from MLflow
+    TRAIN_PARAMS_EXAMPLE = {
+        "params_list": [
+            {
+                "model_name": model_name,
+                "task_name": "train",
+                "params": {
+                    "io_parameters": io_parameters,
+                    "model_parameters": model_parameters,
                 },
-                {
-                    "model_name": model_name,
-                    "task_name": "inference",
-                    "params": {
-                        "io_parameters": io_parameters,
-                        "model_parameters": model_parameters,
-                    },
+            },
+            {
+                "model_name": model_name,
+                "task_name": "inference",
+                "params": {
+                    "io_parameters": io_parameters,
+                    "model_parameters": model_parameters,
                 },
-            ],
-        }
+            },
+        ],
+    }
 
-        if MODE == "dev":
-            job_uid = str(uuid.uuid4())
-            job_message = f"Dev Mode: Job has been succesfully submitted with uid: {job_uid} and mask uri: {mask_uri}"
+    progress(3, "Scheduling training job...")
+    if MODE == "dev":
+        job_uid = str(uuid.uuid4())
+        job_message = f"Dev Mode: Job has been succesfully submitted with uid: {job_uid} and mask uri: {mask_uri}"
+        notification_color = "indigo"
+    else:
+        try:
+            # Schedule job
+            job_uid = schedule_prefect_flow(
+                FLOW_NAME,
+                parameters=TRAIN_PARAMS_EXAMPLE,
+                flow_run_name=flow_run_name,
+                tags=PREFECT_TAGS + ["train", image_uri],
+            )
+            job_message = f"Job has been succesfully submitted with uid: {job_uid} and mask uri: {mask_uri}"
             notification_color = "indigo"
-        else:
-            try:
-                # Schedule job
-                job_uid = schedule_prefect_flow(
-                    FLOW_NAME,
-                    parameters=TRAIN_PARAMS_EXAMPLE,
-                    flow_run_name=flow_run_name,
-                    tags=PREFECT_TAGS + ["train", image_uri],
-                )
-                job_message = f"Job has been succesfully submitted with uid: {job_uid} and mask uri: {mask_uri}"
-                notification_color = "indigo"
-            except Exception as e:
-                # Print the traceback to the console
-                traceback.print_exc()
-                job_uid = None
-                job_message = f"Job presented error: {e}"
-                notification_color = "red"
-
-        notification = generate_notification(
-            "Job Submission", notification_color, ANNOT_ICONS["submit"], job_message
-        )
+        except Exception as e:
+            # Print the traceback to the console
+            traceback.print_exc()
+            job_uid = None
+            job_message = f"Job presented error: {e}"
+            notification_color = "red"
 
-        return notification, model_parameters
-    return no_update, no_update
+    return _submission_result(
+        "Job Submission",
+        notification_color,
+        job_message,
+        model_parameters=model_parameters,
+    )
 
 
 @callback(
     Output("notifications-container", "children", allow_duplicate=True),
+    Output("job-submission", "data", allow_duplicate=True),
+    Output("job-submission-check", "disabled", allow_duplicate=True),
+    Output("job-submission-progress", "value", allow_duplicate=True),
+    Output("job-submission-message", "children", allow_duplicate=True),
+    Output("job-submission-status", "style", allow_duplicate=True),
+    Output("cancel-job-submission", "disabled", allow_duplicate=True),
+    Output("run-train", "disabled", allow_duplicate=True),
+    Output("run-inference", "disabled", allow_duplicate=True),
+    Output("run-batch-inference", "disabled", allow_duplicate=True),
     Input("run-inference", "n_clicks"),
     State("train-job-selector", "value"),
     State({"type": "annotation-class-store", "index": ALL}, "data"),
@@ -176,7 +324,8 @@ def run_inference(
     model_name,
 ):
     """
-    This callback collects parameters from the UI and submits an inference job to Prefect.
+    This callback collects parameters from the UI and starts the submission of an inference
+    job to Prefect in the background, the progress of which is shown by check_job_submission.
     If the app is run from "dev" mode, then only a placeholder job_uid will be created.
 
     # TODO: Appropriately paramaterize the job json depending on user inputs
@@ -194,109 +343,397 @@ def run_inference(
                 ANNOT_ICONS["parameters"],
                 "Model parameters are not valid!",
             )
-            return notification, no_update
+            return (notification,) + (no_update,) * 9
         model_parameters["num_classes"] = len(all_annotations)
         model_parameters["network"] = model_name
+        submission_id = job_submissions.submit(
+            _submit_inference_job,
+            train_job_id,
+            image_uri,
+            model_parameters,
+            model_name,
+            total_steps=2,
+        )
+        return (no_update,) + _job_submission_outputs(submission_id, "Inference")
+    return (no_update,) * 10
 
-        # Set io_parameters for inference, there will be no mask
-        data_uri = tiled_datasets.get_data_uri_by_trimmed_uri(image_uri)
-        io_parameters = assemble_io_parameters_from_uris(data_uri, "")
-        io_parameters["uid_retrieve"] = ""
-
-        # NEW: Add MLflow parameters
-        io_parameters["mlflow_uri"] = MLFLOW_URI
-        io_parameters["mlflow_model"] = None
-
-        # Simplified inference params - only send model_name, task_name, and parameters
-        # The Prefect worker will fetch algorithm details from MLflow
-        INFERENCE_PARAMS_EXAMPLE = {
-            "params_list": [
-                {
-                    "model_name": model_name,
-                    "task_name": "inference",
-                    "params": {
-                        "io_parameters": io_parameters,
-                        "model_parameters": model_parameters,
-                    },
+
+def _resolve_train_job(train_job_id):
+    """
+    Returns the name of the selected training job, and the id of its training portion
+    which is used to retrieve the trained model, or None for both if the job does not exist
+    """
+    job_name = resilient_call("prefect", get_flow_run_name, train_job_id)
+    if job_name is None:
+        return None, None
+    children_flows = resilient_call("prefect", get_children_flow_run_ids, train_job_id)
+    # The first child flow is the training portion of the parent flow
+    # TODO: Maybe check number of children and type in the future
+    return job_name, children_flows[0]
+
+
+def _schedule_inference_flow(
+    image_uri, data_uri, model_parameters, model_name, train_job_id, flow_run_name
+):
+    """
+    Schedules the inference flow for the data uri with the model of the training portion
+    train_job_id, and returns the uid of the scheduled flow run
+    """
+    # Set io_parameters for inference, there will be no mask
+    io_parameters = assemble_io_parameters_from_uris(data_uri, "")
+    # Set the uid_retrieve of the inference job to the uid of the training job
+    io_parameters["uid_retrieve"] = train_job_id
+    io_parameters["job_name"] = flow_run_name
+
+    # NEW: Add MLflow parameters
+    io_parameters["mlflow_uri"] = MLFLOW_URI
+    # NEW: Set mlflow_model to enable loading from MLflow registry
+    io_parameters["mlflow_model"] = train_job_id
+
+    # Simplified inference params - only send model_name, task_name, and parameters
+    # The Prefect worker will fetch algorithm details from MLflow
+    INFERENCE_PARAMS_EXAMPLE = {
+        "params_list": [
+            {
+                "model_name": model_name,
+                "task_name": "inference",
+                "params": {
+                    "io_parameters": io_parameters,
+                    "model_parameters": model_parameters,
                 },
-            ],
-        }
+            },
+        ],
+    }
+    if MODE == "dev":
+        return str(uuid.uuid4())
+    # TODO: Check if the architecture parameters are the same as the one used in training
+    return schedule_prefect_flow(
+        FLOW_NAME,
+        parameters=INFERENCE_PARAMS_EXAMPLE,
+        flow_run_name=flow_run_name,
+        tags=PREFECT_TAGS + ["inference", image_uri],
+    )
 
-        if MODE == "dev":
-            job_uid = str(uuid.uuid4())
-            job_message = f"Job has been succesfully submitted with uid: {job_uid}"
-            notification_color = "indigo"
-        else:
-            if train_job_id is not None:
-                job_name = get_flow_run_name(train_job_id)
-                if job_name is not None:
-                    children_flows = get_children_flow_run_ids(train_job_id)
-                    # The first child flow is the training portion of the parent flow
-                    # TODO: Maybe check number of children and type in the future
-                    train_job_id = children_flows[0]
-
-                    current_time = datetime.now(pytz.timezone(TIMEZONE)).strftime(
-                        "%Y/%m/%d %H:%M:%S"
-                    )
-                    flow_run_name = f"{job_name} {current_time}"
-
-                    # Set the uid_retrieve of the inference job to the uid of the training job
-                    INFERENCE_PARAMS_EXAMPLE["params_list"][0]["params"][
-                        "io_parameters"
-                    ]["uid_retrieve"] = train_job_id
-                    INFERENCE_PARAMS_EXAMPLE["params_list"][0]["params"][
-                        "io_parameters"
-                    ]["job_name"] = flow_run_name
-
-                    # NEW: Set mlflow_model to enable loading from MLflow registry
-                    INFERENCE_PARAMS_EXAMPLE["params_list"][0]["params"][
-                        "io_parameters"
-                    ]["mlflow_model"] = train_job_id
-
-                    # TODO: Check if the architecture parameters are the same as the one used in training
-                    try:
-                        # Schedule job
-                        job_uid = schedule_prefect_flow(
-                            FLOW_NAME,
-                            parameters=INFERENCE_PARAMS_EXAMPLE,
-                            flow_run_name=flow_run_name,
-                            tags=PREFECT_TAGS + ["inference", image_uri],
-                        )
-                        job_message = (
-                            f"Job has been succesfully submitted with uid: {job_uid}"
-                        )
-                        notification_color = "indigo"
-                    except Exception as e:
-                        # Print the traceback to the console
-                        traceback.print_exc()
-                        job_uid = None
-                        job_message = f"Job presented error: {e}"
-                else:
-                    job_message = "Please select a valid train job"
-                    notification_color = "red"
-            else:
-                job_message = "Please select a train job from the dropdown"
+
+def _submit_inference_job(
+    progress, train_job_id, image_uri, model_parameters, model_name
+):
+    """
+    Resolves the training portion of the selected training job and schedules
+    the inference flow. Returns the result of the submission.
+    """
+    if MODE == "dev":
+        job_uid = str(uuid.uuid4())
+        job_message = f"Job has been succesfully submitted with uid: {job_uid}"
+        notification_color = "indigo"
+    elif train_job_id is None:
+        job_message = "Please select a train job from the dropdown"
+        notification_color = "red"
+    else:
+        progress(1, "Retrieving training job...")
+        job_name, train_job_id = _resolve_train_job(train_job_id)
+        if job_name is not None:
+            current_time = datetime.now(pytz.timezone(TIMEZONE)).strftime(
+                "%Y/%m/%d %H:%M:%S"
+            )
+            flow_run_name = f"{job_name} {current_time}"
+            data_uri = tiled_datasets.get_data_uri_by_trimmed_uri(image_uri)
+
+            progress(2, "Scheduling inference job...")
+            try:
+                # Schedule job
+                job_uid = _schedule_inference_flow(
+                    image_uri,
+                    data_uri,
+                    model_parameters,
+                    model_name,
+                    train_job_id,
+                    flow_run_name,
+                )
+                job_message = f"Job has been succesfully submitted with uid: {job_uid}"
+                notification_color = "indigo"
+            except Exception as e:
+                # Print the traceback to the console
+                traceback.print_exc()
+                job_uid = None
+                job_message = f"Job presented error: {e}"
                 notification_color = "red"
+        else:
+            job_message = "Please select a valid train job"
+            notification_color = "red"
 
+    return _submission_result("Job Submission", notification_color, job_message)
+
+
+@callback(
+    Output("notifications-container", "children", allow_duplicate=True),
+    Output("job-submission", "data", allow_duplicate=True),
+    Output("job-submission-check", "disabled", allow_duplicate=True),
+    Output("job-submission-progress", "value", allow_duplicate=True),
+    Output("job-submission-message", "children", allow_duplicate=True),
+    Output("job-submission-status", "style", allow_duplicate=True),
+    Output("cancel-job-submission", "disabled", allow_duplicate=True),
+    Output("run-train", "disabled", allow_duplicate=True),
+    Output("run-inference", "disabled", allow_duplicate=True),
+    Output("run-batch-inference", "disabled", allow_duplicate=True),
+    Input("run-batch-inference", "n_clicks"),
+    State("train-job-selector", "value"),
+    State({"type": "annotation-class-store", "index": ALL}, "data"),
+    State("batch-inference-uris", "value"),
+    State("batch-inference-search", "value"),
+    State("model-parameters", "children"),
+    State("model-list", "value"),
+    prevent_initial_call=True,
+)
+def run_batch_inference(
+    n_clicks,
+    train_job_id,
+    all_annotations,
+    batch_image_uris,
+    batch_search_query,
+    model_parameter_container,
+    model_name,
+):
+    """
+    This callback starts the submission of inference jobs for a list of datasets
+    (one trimmed uri per line) and/or the datasets matching a search in the background,
+    the progress of which is shown by check_job_submission.
+    """
+    if n_clicks:
+        model_parameters, parameter_errors = extract_parameters_from_html(
+            model_parameter_container
+        )
+        # Check if the model parameters are valid
+        if parameter_errors:
+            notification = generate_notification(
+                "Model Parameters",
+                "red",
+                ANNOT_ICONS["parameters"],
+                "Model parameters are not valid!",
+            )
+            return (notification,) + (no_update,) * 9
+        model_parameters["num_classes"] = len(all_annotations)
+        model_parameters["network"] = model_name
+        image_uris = [
+            image_uri.strip()
+            for image_uri in (batch_image_uris or "").splitlines()
+            if image_uri.strip()
+        ]
+        submission_id = job_submissions.submit(
+            _submit_batch_inference_job,
+            train_job_id,
+            image_uris,
+            (batch_search_query or "").strip(),
+            model_parameters,
+            model_name,
+            total_steps=3,
+        )
+        return (no_update,) + _job_submission_outputs(submission_id, "Batch inference")
+    return (no_update,) * 10
+
+
+def _get_data_uri(image_uri):
+    try:
+        return tiled_datasets.get_data_uri_by_trimmed_uri(image_uri)
+    except Exception as e:
+        print(f"Error resolving data uri of {image_uri}: {e}")
+        return None
+
+
+def _submit_batch_inference_job(
+    progress, train_job_id, image_uris, search_query, model_parameters, model_name
+):
+    """
+    Schedules an inference flow with the model of the selected training job for every
+    dataset. The training job is validated before datasets are searched. Data uris are
+    resolved and flows are scheduled in parallel, with at most BATCH_INFERENCE_CONCURRENCY
+    requests at a time. Cancelling stops scheduling further flows. Returns a result
+    summarizing the submitted job ids.
+    """
+    if train_job_id is None:
+        return _submission_result(
+            "Job Submission", "red", "Please select a train job from the dropdown"
+        )
+
+    progress(1, "Retrieving training job...")
+    if MODE == "dev":
+        job_name, train_job_id = "Dev", train_job_id
+    else:
+        job_name, train_job_id = _resolve_train_job(train_job_id)
+        if job_name is None:
+            return _submission_result(
+                "Job Submission", "red", "Please select a valid train job"
+            )
+
+    progress(2, "Finding datasets...")
+    image_uris = collect_dataset_uris(
+        image_uris,
+        search_query,
+        tiled_datasets.search_data_project_names,
+        BATCH_INFERENCE_MAX_DATASETS,
+    )
+    if len(image_uris) == 0:
+        return _submission_result(
+            "Job Submission",
+            "red",
+            "No datasets were given or found for batch inference",
+        )
+
+    total_steps = 3 + len(image_uris)
+    progress(3, f"Resolving {len(image_uris)} datasets...", total_steps)
+    current_time = datetime.now(pytz.timezone(TIMEZONE)).strftime("%Y/%m/%d %H:%M:%S")
+
+    def schedule(image_uri, data_uri):
+        return _schedule_inference_flow(
+            image_uri,
+            data_uri,
+            model_parameters,
+            model_name,
+            train_job_id,
+            f"{job_name} {image_uri} {current_time}",
+        )
+
+    def scheduling_progress(submitted_jobs, failed_jobs):
+        progress(
+            3 + len(submitted_jobs) + len(failed_jobs),
+            f"Scheduled {len(submitted_jobs)} of {len(image_uris)} jobs...",
+        )
+
+    submitted_jobs, failed_jobs, cancelled = schedule_per_dataset(
+        image_uris,
+        _get_data_uri,
+        schedule,
+        scheduling_progress,
+        concurrency=BATCH_INFERENCE_CONCURRENCY,
+    )
+
+    print(
+        f"Batch inference with {job_name}: submitted {submitted_jobs}, failed {failed_jobs}"
+    )
+    summary = f"Submitted {len(submitted_jobs)} of {len(image_uris)} inference jobs."
+    if cancelled:
+        summary += " The remaining jobs were cancelled."
+    if len(submitted_jobs) == len(image_uris):
+        notification_color = "indigo"
+    elif len(submitted_jobs) > 0:
+        notification_color = "yellow"
+    else:
+        notification_color = "red"
+    details = [
+        (f"{image_uri}: {job_uid}", None)
+        for image_uri, job_uid in submitted_jobs.items()
+    ] + [(f"{image_uri}: {error}", "red") for image_uri, error in failed_jobs.items()]
+    return _submission_result(
+        "Batch Job Submission", notification_color, summary, details=details
+    )
+
+
+@callback(
+    Output("notifications-container", "children", allow_duplicate=True),
+    Output("model-parameter-values", "data"),
+    Output("job-submission-check", "disabled", allow_duplicate=True),
+    Output("job-submission-progress", "value", allow_duplicate=True),
+    Output("job-submission-message", "children", allow_duplicate=True),
+    Output("job-submission-status", "style", allow_duplicate=True),
+    Output("cancel-job-submission", "disabled", allow_duplicate=True),
+    Output("run-train", "disabled", allow_duplicate=True),
+    Output("run-inference", "disabled", allow_duplicate=True),
+    Output("run-batch-inference", "disabled", allow_duplicate=True),
+    Input("job-submission-check", "n_intervals"),
+    State("job-submission", "data"),
+    prevent_initial_call=True,
+)
+def check_job_submission(n_intervals, job_submission):
+    """
+    Shows the progress of the current job submission, and its outcome once it finished
+    """
+    if job_submission is None:
+        return (no_update,) * 10
+    label = job_submission["label"]
+    status = job_submissions.get_status(job_submission["id"])
+    if status is None:
+        # The status of the submission expired or was removed
+        notification = generate_notification(
+            "Job Submission",
+            "red",
+            ANNOT_ICONS["submit"],
+            f"The status of the {label.lower()} submission is no longer available.",
+        )
+        return (notification, no_update, True, 0, "", {"display": "none"}) + (
+            True,
+            False,
+            False,
+            False,
+        )
+    progress_value = 100 * status["step"] / status["total_steps"]
+    if status["finished_at"] is None:
+        message = f"{label}: {status['message']}"
+        return (no_update, no_update, no_update, progress_value, message) + (
+            no_update,
+        ) * 5
+
+    model_parameters = no_update
+    if status["state"] == "done":
+        notification = _submission_notification(status["result"])
+        if status["result"]["model_parameters"] is not None:
+            model_parameters = status["result"]["model_parameters"]
+    elif status["state"] == "cancelled":
+        notification = generate_notification(
+            "Job Submission",
+            "yellow",
+            ANNOT_ICONS["submit"],
+            f"The {label.lower()} submission was cancelled.",
+        )
+    else:
         notification = generate_notification(
-            "Job Submission", notification_color, ANNOT_ICONS["submit"], job_message
+            "Job Submission",
+            "red",
+            ANNOT_ICONS["submit"],
+            f"Job presented error: {status['error']}",
         )
+    return (notification, model_parameters, True, 0, "", {"display": "none"}) + (
+        True,
+        False,
+        False,
+        False,
+    )
 
-        return notification
 
-    return no_update
+@callback(
+    Output("cancel-job-submission", "disabled", allow_duplicate=True),
+    Output("job-submission-message", "children", allow_duplicate=True),
+    Input("cancel-job-submission", "n_clicks"),
+    State("job-submission", "data"),
+    prevent_initial_call=True,
+)
+def cancel_job_submission(n_clicks, job_submission):
+    """
+    Cancels the current job submission before its next step,
+    jobs that were already scheduled are not affected
+    """
+    if not n_clicks or job_submission is None:
+        return no_update, no_update
+    if job_submissions.cancel(job_submission["id"]):
+        return True, f"{job_submission['label']}: cancelling..."
+    return True, no_update
 
 
 @callback(
     Output("train-job-selector", "data"),
     Output("infra-state", "data", allow_duplicate=True),
+    Output("job-list-versions", "data", allow_duplicate=True),
     Input("model-check", "n_intervals"),
+    Input("job-events", "message"),
+    State("job-list-versions", "data"),
     prevent_initial_call=True,
 )
-def check_train_job(n_intervals):
+def check_train_job(n_intervals, job_event, job_list_versions):
     """
     This callback populates the train job selector dropdown with job names and ids from Prefect.
     This callback displays the current status of the job as part of the job name in the dropdown.
+    Job lists are served from the shared job poller, and the dropdown is only updated
+    if the list changed since it was last sent to this tab. The poller pushes changes
+    through the job event stream, the model-check interval is only a fallback.
     In "dev" mode, the dropdown is populated with the sample data below.
     """
     if MODE == "dev":
@@ -305,35 +742,70 @@ def check_train_job(n_intervals):
             {"label": "🕑 DLSIA XYC 03/11/2024 14:21PM", "value": "uid0002"},
             {"label": "✅ DLSIA CBA 03/11/2024 10:02AM", "value": "uid0003"},
         ]
-        return data, no_update
+        return data, no_update, no_update
 
-    data = []
+    job_list = job_poller.get(("train",), _query_train_jobs)
     infra_state = no_update
-    try:
-        data = query_flow_runs(tags=PREFECT_TAGS + ["train"])
-    except Exception:
+    if job_list["error"]:
         # Communication with Prefect failed, update the infra_state
         infra_state = Patch()
         infra_state["prefect_ready"] = False
 
-    return data, infra_state
+    if job_list["version"] in (None, job_list_versions.get("train")):
+        return no_update, infra_state, no_update
+    patched_versions = Patch()
+    patched_versions["train"] = job_list["version"]
+    return job_list["data"], infra_state, patched_versions
+
+
+def _query_train_jobs():
+    train_jobs = resilient_call(
+        "prefect", query_flow_runs, tags=PREFECT_TAGS + ["train"]
+    )
+    # Resolve the MLflow runs of new training jobs in the background
+    global _warmed_train_jobs_version
+    train_jobs_version = JobPoller.get_version(train_jobs)
+    if train_jobs_version != _warmed_train_jobs_version:
+        _warmed_train_jobs_version = train_jobs_version
+        _warmup_executor.submit(_warm_mlflow_run_ids, train_jobs)
+    return train_jobs
+
+
+def _query_inference_jobs(train_job_id, image_uri):
+    job_name = resilient_call("prefect", get_flow_run_name, train_job_id)
+    if job_name is None:
+        return []
+    return resilient_call(
+        "prefect",
+        query_flow_runs,
+        flow_run_name=job_name,
+        tags=PREFECT_TAGS + ["inference", image_uri],
+    )
 
 
 @callback(
     Output("inference-job-selector", "data"),
     Output("inference-job-selector", "value"),
     Output("infra-state", "data", allow_duplicate=True),
+    Output("job-list-versions", "data", allow_duplicate=True),
     Input("model-check", "n_intervals"),
+    Input("job-events", "message"),
     Input("train-job-selector", "value"),
     State("image-uri", "value"),
+    State("job-list-versions", "data"),
     prevent_initial_call=True,
 )
-def check_inference_job(n_intervals, train_job_id, image_uri):
+def check_inference_job(
+    n_intervals, job_event, train_job_id, image_uri, job_list_versions
+):
     """
     This callback populates the inference job selector dropdown with job names and ids from Prefect.
     The list of jobs is filtered by the selected train job in the train job selector dropdown.
     The selected value is set to None if the list of jobs is empty.
     This callback displays the current status of the job as part of the job name in the dropdown.
+    Job lists are served from the shared job poller, and the dropdown is only updated
+    if the list changed since it was last sent to this tab.
+    Changes are pushed through the job event stream.
     In "dev" mode, the dropdown is populated with the sample data below.
     """
     if MODE == "dev":
@@ -342,29 +814,95 @@ def check_inference_job(n_intervals, train_job_id, image_uri):
             {"label": "🕑 DLSIA XYC 03/11/2024 14:21PM", "value": "uid0005"},
             {"label": "✅ DLSIA CBA 03/11/2024 10:02AM", "value": "uid0006"},
         ]
-        return data, no_update, no_update
+        return data, no_update, no_update, no_update
+
+    if train_job_id is None:
+        job_list = {"data": [], "version": JobPoller.get_version([]), "error": False}
+    else:
+        job_list = job_poller.get(
+            ("inference", train_job_id, image_uri),
+            partial(_query_inference_jobs, train_job_id, image_uri),
+        )
+    infra_state = no_update
+    if job_list["error"]:
+        # Communication with Prefect failed, update the infra_state
+        infra_state = Patch()
+        infra_state["prefect_ready"] = False
 
-    data = []
+    if job_list["version"] in (None, job_list_versions.get("inference")):
+        return no_update, no_update, infra_state, no_update
+    patched_versions = Patch()
+    patched_versions["inference"] = job_list["version"]
+    data = job_list["data"]
+    selected_value = None if len(data) == 0 else no_update
+    return data, selected_value, infra_state, patched_versions
 
-    if train_job_id is not None:
-        try:
-            job_name = get_flow_run_name(train_job_id)
-            if job_name is not None:
-                data = query_flow_runs(
-                    flow_run_name=job_name,
-                    tags=PREFECT_TAGS + ["inference", image_uri],
-                )
-            infra_state = no_update
 
-        except Exception:
-            # Communication with Prefect failed, update the infra_state
-            infra_state = Patch()
-            infra_state["prefect_ready"] = False
+# MLflow run ids per training job id, together with the expiry time of negative results
+_mlflow_run_ids = {}
+_mlflow_run_ids_lock = threading.Lock()
+# Run ids of training jobs are resolved in the background when the list of jobs changes
+_warmup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mlflow-warmup")
+_warmed_train_jobs_version = None
+
+# Children flow ids and result metadata of completed jobs
+finished_jobs = FinishedJobCache(
+    partial(resilient_call, "prefect", get_flow_run_state),
+    partial(resilient_call, "prefect", get_children_flow_run_ids),
+    max_size=FINISHED_JOB_CACHE_SIZE,
+)
+
+
+def get_mlflow_run_id(segment_job_id):
+    """
+    Returns the MLflow run id of a training job, or None if no model was registered for it.
+    Run ids are cached, and jobs without a registered model are looked up again after
+    MLFLOW_RUN_ID_NEGATIVE_TTL seconds.
+    """
+    now = time.monotonic()
+    with _mlflow_run_ids_lock:
+        cached = _mlflow_run_ids.get(segment_job_id)
+    if cached is not None and (cached[1] is None or cached[1] > now):
+        return cached[0]
+    # Training jobs register their model under the Prefect flow run ID
+    model_versions = resilient_call(
+        "mlflow",
+        get_mlflow_model_client().client.search_model_versions,
+        filter_string=f"name='{segment_job_id}'",
+    )
+    if model_versions:
+        cached = (model_versions[0].run_id, None)
     else:
-        infra_state = no_update
+        cached = (None, now + MLFLOW_RUN_ID_NEGATIVE_TTL)
+    with _mlflow_run_ids_lock:
+        _mlflow_run_ids[segment_job_id] = cached
+    return cached[0]
 
-    selected_value = None if len(data) == 0 else no_update
-    return data, selected_value, infra_state
+
+def _warm_mlflow_run_ids(train_jobs):
+    """
+    Resolves the MLflow run ids of finished training jobs, such that selecting a job
+    does not wait for MLflow
+    """
+    for train_job in train_jobs[:MLFLOW_WARMUP_JOBS]:
+        try:
+            finished_job = finished_jobs.get(train_job["value"], expected_children=2)
+            if finished_job is not None and finished_job["children_flows"]:
+                get_mlflow_run_id(finished_job["children_flows"][0])
+        except Exception as e:
+            print(f"Error resolving MLflow run ID of {train_job['value']}: {e}")
+
+
+def _get_result_metadata(expected_result_uri):
+    """
+    Reads the metadata of a result container, reconnecting to the results server only
+    if the result cannot be found, as the root container may not yet have existed on startup
+    """
+    try:
+        return tiled_results.get_data_slice_by_trimmed_uri(expected_result_uri).metadata
+    except Exception:
+        tiled_results.refresh_data_client()
+        return tiled_results.get_data_slice_by_trimmed_uri(expected_result_uri).metadata
 
 
 def populate_segmentation_results(
@@ -375,14 +913,18 @@ def populate_segmentation_results(
     """
     This function populates the segmentation results store based on the uids
     of the training job or inference job.
+    Children and result metadata of finished jobs are cached,
+    such that switching between previously viewed results does not query Prefect or Tiled.
     """
     # Nothing has been selected is job_id is None
     if job_id is not None:
         data_uri = tiled_datasets.get_data_uri_by_trimmed_uri(image_uri)
-        # Only returns the name if the job finished successfully
-        job_name = get_flow_run_name(job_id)
-        if job_name is not None:
-            children_flows = get_children_flow_run_ids(job_id)
+        # Training jobs run an inference on the annotated slices after training
+        finished_job = finished_jobs.get(
+            job_id, expected_children=2 if job_type == "training" else 1
+        )
+        if finished_job is not None:
+            children_flows = finished_job["children_flows"]
             if job_type == "training":
                 # Get second child to retrieve results
                 # (inference on just annotated slices for the training job)
@@ -395,34 +937,30 @@ def populate_segmentation_results(
                         "Cannot retrieve result as inference for training did not complete!",
                     )
                     return notification, None, None
-                job_id = children_flows[1]
+                result_job_id = children_flows[1]
             else:
                 # There will be only one child
-                job_id = children_flows[0]
-            expected_result_uri = f"{job_id}/seg_result"
-            try:
-                # First refresh the data client,
-                # the root container may not yet have existed on startup
-                tiled_results.refresh_data_client()
-                result_container = tiled_results.get_data_slice_by_trimmed_uri(
-                    expected_result_uri
-                )
-            except Exception:
-                notification = generate_notification(
-                    "Segmentation Results",
-                    "red",
-                    ANNOT_ICONS["results"],
-                    f"Could not retrieve result from {job_type} job!",
-                )
-                return notification, None, children_flows[0]
-            result_metadata = result_container.metadata
-            # Check if the result corresponds to the current image_uri
-            if result_metadata["data_uri"] == data_uri:
-                result_store = {
+                result_job_id = children_flows[0]
+            expected_result_uri = f"{result_job_id}/seg_result"
+            if finished_job["result"] is None:
+                try:
+                    result_metadata = _get_result_metadata(expected_result_uri)
+                except Exception:
+                    notification = generate_notification(
+                        "Segmentation Results",
+                        "red",
+                        ANNOT_ICONS["results"],
+                        f"Could not retrieve result from {job_type} job!",
+                    )
+                    return notification, None, children_flows[0]
+                finished_job["result"] = {
                     "seg_result_trimmed_uri": expected_result_uri,
                     "mask_idx": result_metadata["mask_idx"],
                     "data_uri": result_metadata["data_uri"],
                 }
+            # Check if the result corresponds to the current image_uri
+            if finished_job["result"]["data_uri"] == data_uri:
+                result_store = dict(finished_job["result"])
                 notification = generate_notification(
                     "Segmentation Results",
                     "green",
@@ -470,13 +1008,9 @@ def populate_segmentation_results_train(
             # segment_job_id is the Prefect training flow run ID
             # It's also used as the MLflow registered model name
             # Get the registered model to find the actual MLflow run_id
-            model_versions = mlflow_client.client.search_model_versions(
-                filter_string=f"name='{segment_job_id}'"
-            )
+            mlflow_run_id = get_mlflow_run_id(segment_job_id)
 
-            if model_versions and len(model_versions) > 0:
-                # Get the run_id from the model version
-                mlflow_run_id = model_versions[0].run_id
+            if mlflow_run_id is not None:
                 print(
                     f"Found MLflow run ID: {mlflow_run_id} for Prefect flow: {segment_job_id}"
                 )
@@ -57,7 +57,7 @@ def annotation_class_item(class_color, class_label, existing_ids, data=None):
             dcc.Store(id={"type": "deleted-class-store", "index": class_id}),
             dcc.Store(
                 id={"type": "hide-show-class-store", "index": class_id},
-                data={"is_visible": True},
+                data={"is_visible": is_visible},
             ),
             dcc.Store(
                 id={"type": "edit-class-store", "index": class_id},
@@ -97,7 +97,11 @@ def annotation_class_item(class_color, class_label, existing_ids, data=None):
             ),
             html.Div(
                 [
-                    get_action_icon("hide-annotation-class", class_id, "mdi:eye"),
+                    get_action_icon(
+                        "hide-annotation-class",
+                        class_id,
+                        "mdi:eye" if is_visible else "mdi:hide",
+                    ),
                     get_action_icon("edit-annotation-class", class_id, "uil:edit"),
                     get_action_icon(
                         "delete-annotation-class", class_id, "octicon:trash-24"
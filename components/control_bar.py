@@ -4,7 +4,7 @@ import dash_bootstrap_components as dbc
 import dash_mantine_components as dmc
 import tiled_viewer
 from dash import dcc, html
-from dash_extensions import EventListener
+from dash_extensions import EventListener, EventSource
 from dash_iconify import DashIconify
 
 from components.annotation_class import annotation_class_item
@@ -558,6 +558,27 @@ def layout():
                                                 ],
                                             ),
                                         ),
+                                        dmc.Center(
+                                            dmc.HoverCard(
+                                                withArrow=True,
+                                                shadow="md",
+                                                children=[
+                                                    dmc.HoverCardTarget(
+                                                        dmc.Button(
+                                                            "From saved mask",
+                                                            variant="light",
+                                                            style={
+                                                                "width": "160px",
+                                                                "margin": "5px",
+                                                            },
+                                                        )
+                                                    ),
+                                                    dmc.HoverCardDropdown(
+                                                        id="load-annotations-mask-container",
+                                                    ),
+                                                ],
+                                            ),
+                                        ),
                                         dmc.Space(h=20),
                                         dmc.Divider(
                                             variant="solid",
@@ -635,6 +656,40 @@ def layout():
                                     variant="light",
                                     style={"width": "100%", "margin": "5px"},
                                 ),
+                                # Progress of the current train or inference submission
+                                html.Div(
+                                    id="job-submission-status",
+                                    style={"display": "none"},
+                                    children=[
+                                        dmc.Space(h=10),
+                                        dmc.Text(
+                                            id="job-submission-message",
+                                            size="sm",
+                                            color="#9EA4AB",
+                                        ),
+                                        dmc.Space(h=5),
+                                        dmc.Progress(
+                                            id="job-submission-progress",
+                                            value=0,
+                                            striped=True,
+                                            animate=True,
+                                        ),
+                                        dmc.Space(h=5),
+                                        dmc.Button(
+                                            "Cancel submission",
+                                            id="cancel-job-submission",
+                                            variant="subtle",
+                                            color="red",
+                                            size="xs",
+                                        ),
+                                    ],
+                                ),
+                                dcc.Store(id="job-submission"),
+                                dcc.Interval(
+                                    id="job-submission-check",
+                                    interval=500,
+                                    disabled=True,
+                                ),
                                 dmc.Space(h=10),
                                 ControlItem(
                                     "Train Jobs",
@@ -667,6 +722,34 @@ def layout():
                                     style={"width": "100%", "margin": "5px"},
                                 ),
                                 dmc.Space(h=10),
+                                ControlItem(
+                                    "Batch Datasets",
+                                    "batch-inference-uris-input",
+                                    dmc.Textarea(
+                                        id="batch-inference-uris",
+                                        placeholder="One dataset per line...",
+                                        autosize=True,
+                                        minRows=2,
+                                        maxRows=6,
+                                    ),
+                                ),
+                                dmc.Space(h=5),
+                                ControlItem(
+                                    "Batch Search",
+                                    "batch-inference-search-input",
+                                    dmc.TextInput(
+                                        id="batch-inference-search",
+                                        placeholder="Search dataset metadata...",
+                                    ),
+                                ),
+                                dmc.Space(h=5),
+                                dmc.Button(
+                                    "Batch Inference",
+                                    id="run-batch-inference",
+                                    variant="light",
+                                    style={"width": "100%", "margin": "5px"},
+                                ),
+                                dmc.Space(h=10),
                                 ControlItem(
                                     "Inference Jobs",
                                     "selected-inference-job",
@@ -775,6 +858,9 @@ def drawer_section(children):
                     "image_center_coor": {},
                 },
             ),
+            # Number of shapes per class for every annotated slice,
+            # maintained incrementally as shapes are added to or removed from a slice
+            dcc.Store(id="annotated-slices-index", data={}),
             create_reset_view_affix(),
             create_info_card_affix(),
             create_viewfinder_affix(),
@@ -782,9 +868,12 @@ def drawer_section(children):
             dmc.NotificationsProvider(html.Div(id="notifications-container")),
             dcc.Download(id="export-annotation-metadata"),
             dcc.Download(id="export-annotation-mask"),
-            dcc.Interval(
-                id="model-check", interval=5000
-            ),  # TODO: May want to increase frequency
+            # Job list changes are pushed through the job event stream,
+            # polling is only a fallback for connections that do not support it
+            EventSource(id="job-events", url="/job-events"),
+            dcc.Interval(id="model-check", interval=60000),
+            # Versions of the job lists shown in this tab, to skip unchanged updates
+            dcc.Store(id="job-list-versions", data={}),
             dcc.Interval(id="infra-check", interval=60000),
             dcc.Store(id="infra-state"),
             html.Div(id="dummy-output"),
@@ -0,0 +1,164 @@
+import numpy as np
+import pytest
+
+from utils.annotations import (
+    Annotations,
+    ShapeConversion,
+    build_annotated_slices_index,
+    count_slice_annotations,
+    get_annotated_slices,
+    get_slice_shapes,
+    mask_slice_to_shapes,
+    parse_plotly_path,
+    simplify_closed_path,
+    strip_shape_style,
+)
+
+
+@pytest.fixture
+def annotation_store():
+    rectangle = {"type": "rect", "x0": 1, "y0": 1, "x1": 3, "y1": 3}
+    return [
+        {
+            "class_id": 0,
+            "label": "Class 1",
+            "color": "#FF0000",
+            "is_visible": True,
+            "annotations": {"10": [rectangle, rectangle], "2": [rectangle]},
+        },
+        {
+            "class_id": 3,
+            "label": "Class 2",
+            "color": "#00FF00",
+            "is_visible": True,
+            "annotations": {"2": [rectangle]},
+        },
+    ]
+
+
+def test_count_slice_annotations(annotation_store):
+    assert count_slice_annotations(annotation_store, "2") == {"0": 1, "3": 1}
+    assert count_slice_annotations(annotation_store, "5") == {}
+
+
+def test_build_annotated_slices_index(annotation_store):
+    index = build_annotated_slices_index(annotation_store)
+    assert index == {"10": {"0": 2}, "2": {"0": 1, "3": 1}}
+    assert get_annotated_slices(index) == ["2", "10"]
+
+
+def test_annotations_with_annotated_slices(annotation_store):
+    index = build_annotated_slices_index(annotation_store)
+    annotations = Annotations(
+        annotation_store, (5, 5), annotated_slices=get_annotated_slices(index)
+    )
+    assert list(annotations.get_annotations().keys()) == ["2", "10"]
+    assert annotations.get_annotations_hash() == (
+        Annotations(annotation_store, (5, 5)).get_annotations_hash()
+    )
+
+
+def test_simplify_closed_path():
+    # A square with many collinear vertices along its edges
+    edge = [f"L{x},0" for x in range(1, 11)]
+    edge += [f"L10,{y}" for y in range(1, 11)]
+    edge += [f"L{x},10" for x in range(9, -1, -1)]
+    edge += [f"L0,{y}" for y in range(9, 0, -1)]
+    path = "M0,0" + "".join(edge) + "Z"
+    simplified = simplify_closed_path(path, tolerance=0.5)
+    assert simplified == "M0.00,0.00L10.00,0.00L10.00,10.00L0.00,10.00Z"
+    assert simplify_closed_path(path, tolerance=0) == path
+    # Paths with curves are left untouched
+    assert simplify_closed_path("M0,0C1,1,2,2,3,3Z") == "M0,0C1,1,2,2,3,3Z"
+
+
+def test_parse_plotly_path():
+    vertices = parse_plotly_path("M1.5,2L3,4.25L-1e1,5Z")
+    assert vertices.dtype == np.float32
+    np.testing.assert_array_equal(vertices, [[1.5, 2], [3, 4.25], [-10, 5]])
+    # Repeated paths are served from the cache
+    assert parse_plotly_path("M1.5,2L3,4.25L-1e1,5Z") is vertices
+    assert parse_plotly_path("M0,0Q1,1,2,0Z") is None
+    # Malformed paths are not truncated into different polygons
+    assert parse_plotly_path("M1.2.3,4L5,6Z") is None
+    assert parse_plotly_path("M1,2L3Z") is None
+    assert parse_plotly_path("MZ") is None
+
+
+def test_closed_path_to_array_matches_svgpathtools():
+    path = "M1.2,1.5L8.7,2.1L7.9,8.3L2.4,6.6Z"
+    mask = ShapeConversion.closed_path_to_array({"path": path}, (10, 10), 2)
+    svg_vertices = ShapeConversion.svg_path_to_vertices(path)
+    np.testing.assert_allclose(parse_plotly_path(path), svg_vertices, rtol=1e-6)
+    assert mask.dtype == np.int8
+    assert set(np.unique(mask)) == {-1, 2}
+
+
+def test_shapes_are_styled_at_render_time(annotation_store):
+    drawn_shape = {
+        "type": "rect",
+        "x0": 0,
+        "y0": 0,
+        "x1": 2,
+        "y1": 2,
+        "fillcolor": "#FF0000",
+        "line": {"color": "#FF0000", "width": 4},
+    }
+    stored_shape = strip_shape_style(drawn_shape, 0)
+    assert stored_shape["name"] == "0"
+    assert "fillcolor" not in stored_shape
+    assert stored_shape["line"] == {"width": 4}
+
+    annotation_store[0]["annotations"]["7"] = [stored_shape]
+    annotation_store[0]["color"] = "#0000FF"
+    (shape,) = get_slice_shapes(annotation_store, "7")
+    assert shape["fillcolor"] == "#0000FF"
+    assert shape["line"] == {"width": 4, "color": "#0000FF"}
+
+    annotation_store[0]["is_visible"] = False
+    assert get_slice_shapes(annotation_store, "7") == []
+
+
+def test_mask_slice_to_shapes_round_trip():
+    mask = np.full((20, 20), -1, dtype=np.int8)
+    mask[2:10, 3:15] = 0
+    mask[12:20, 0:5] = 1
+    mask[15, 15] = 1
+    shapes = mask_slice_to_shapes(mask)
+    assert sorted(shapes.keys()) == ["0", "1"]
+    assert len(shapes["1"]) == 2
+    assert all(shape["name"] == "1" for shape in shapes["1"])
+
+    restored = np.full_like(mask, -1)
+    for class_id, class_shapes in shapes.items():
+        for shape in class_shapes:
+            shape_mask = ShapeConversion.closed_path_to_array(
+                {"path": shape["path"]}, mask.shape, int(class_id)
+            )
+            restored[shape_mask >= 0] = shape_mask[shape_mask >= 0]
+    np.testing.assert_array_equal(restored, mask)
+
+
+def test_mask_slice_to_shapes_round_trip_with_holes():
+    mask = np.full((24, 24), -1, dtype=np.int8)
+    # A ring with an island of the same class in its hole, and another class around it
+    mask[2:20, 2:20] = 0
+    mask[6:16, 6:16] = -1
+    mask[9:13, 9:13] = 0
+    mask[0:24, 21:24] = 1
+    shapes = mask_slice_to_shapes(mask)
+    # The ring and the island are separate shapes, the hole is a subpath of the ring
+    assert len(shapes["0"]) == 2
+    assert sorted(shape["path"].count("M") for shape in shapes["0"]) == [1, 2]
+
+    restored = np.full_like(mask, -1)
+    for class_id, class_shapes in shapes.items():
+        for shape in class_shapes:
+            shape_mask = ShapeConversion.closed_path_to_array(
+                {"path": shape["path"]}, mask.shape, int(class_id)
+            )
+            restored[shape_mask >= 0] = shape_mask[shape_mask >= 0]
+    np.testing.assert_array_equal(restored, mask)
+    # Paths with holes are not simplified as a single polygon
+    ring_path = max((shape["path"] for shape in shapes["0"]), key=len)
+    assert simplify_closed_path(ring_path) == ring_path
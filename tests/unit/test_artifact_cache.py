@@ -0,0 +1,60 @@
+import os
+import threading
+
+import pytest
+
+from utils.artifact_cache import ArtifactCache
+
+
+def test_artifact_cache(tmp_path):
+    artifact_cache = ArtifactCache(str(tmp_path / "cache"), max_bytes=1024)
+    downloads = []
+
+    def download(tmp_dir):
+        downloads.append(tmp_dir)
+        path = os.path.join(tmp_dir, "report.html")
+        with open(path, "w") as f:
+            f.write("<html></html>")
+        return path
+
+    path, content_hash, created = artifact_cache.get(
+        "run1", "dvc_metrics/report.html", download
+    )
+    with open(path) as f:
+        assert f.read() == "<html></html>"
+    # Artifacts are downloaded once and shared by content
+    assert artifact_cache.get("run1", "dvc_metrics/report.html", download) == (
+        path,
+        content_hash,
+        created,
+    )
+    assert artifact_cache.get("run2", "dvc_metrics/report.html", download)[0] == path
+    assert len(downloads) == 2
+    assert os.listdir(artifact_cache.blobs_dir) == [content_hash]
+
+
+def test_artifact_cache_failed_download(tmp_path):
+    artifact_cache = ArtifactCache(str(tmp_path / "cache"), max_bytes=1024)
+
+    def download(tmp_dir):
+        raise ConnectionError("unreachable")
+
+    with pytest.raises(ConnectionError):
+        artifact_cache.get("run1", "dvc_metrics/report.html", download)
+    # The download lock is dropped, also when the download failed
+    assert artifact_cache._download_locks == {}
+
+
+def test_artifact_cache_keeps_newer_download_lock(tmp_path):
+    artifact_cache = ArtifactCache(str(tmp_path / "cache"), max_bytes=1024)
+    ref_path = artifact_cache._get_ref_path("run1", "dvc_metrics/report.html")
+
+    def download(tmp_dir):
+        # Another download of the same artifact registered a new lock in the meantime
+        artifact_cache._download_locks[ref_path] = newer_lock
+        raise ConnectionError("unreachable")
+
+    newer_lock = threading.Lock()
+    with pytest.raises(ConnectionError):
+        artifact_cache.get("run1", "dvc_metrics/report.html", download)
+    assert artifact_cache._download_locks == {ref_path: newer_lock}
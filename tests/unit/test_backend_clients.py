@@ -0,0 +1,30 @@
+import pytest
+
+from utils.backend_clients import LazyClientRegistry
+from utils.startup_timing import startup_timer
+
+
+def test_lazy_client_registry():
+    calls = []
+
+    def create_client():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("unreachable")
+        return object()
+
+    registry = LazyClientRegistry()
+    registry.register("test", create_client)
+    # Clients are not created on registration, and failed creations are retried
+    assert calls == []
+    with pytest.raises(ConnectionError):
+        registry.get("test")
+    client = registry.get("test")
+    assert registry.get("test") is client
+    assert len(calls) == 2
+
+    registry.reset("test")
+    assert registry.get("test") is not client
+    assert "create test client" in [
+        step["name"] for step in startup_timer.get_report()["steps"]
+    ]
@@ -0,0 +1,83 @@
+import threading
+
+from utils.batch_inference import collect_dataset_uris, schedule_per_dataset
+from utils.job_submissions import SubmissionCancelled
+
+
+def test_collect_dataset_uris():
+    searches = []
+
+    def search(query, limit):
+        searches.append((query, limit))
+        return ["project/b", "project/c", "project/d"]
+
+    # Selected datasets come first, followed by the search results without duplicates
+    assert collect_dataset_uris(["project/a", "project/b"], "proj", search, 3) == [
+        "project/a",
+        "project/b",
+        "project/c",
+    ]
+    assert searches == [("proj", 3)]
+    # Without a search query, only the selected datasets are used
+    assert collect_dataset_uris(["project/a"], "", search, 3) == ["project/a"]
+    assert len(searches) == 1
+
+
+def test_schedule_per_dataset():
+    image_uris = ["project/a", "project/b", "project/c", "project/missing"]
+    scheduled = []
+    lock = threading.Lock()
+
+    def get_data_uri(image_uri):
+        return None if image_uri == "project/missing" else f"http://tiled/{image_uri}"
+
+    def schedule(image_uri, data_uri):
+        with lock:
+            scheduled.append(image_uri)
+        if image_uri == "project/c":
+            raise ConnectionError("unreachable")
+        return f"job-{image_uri}"
+
+    progress = []
+    submitted, failed, cancelled = schedule_per_dataset(
+        image_uris,
+        get_data_uri,
+        schedule,
+        lambda submitted, failed: progress.append(len(submitted) + len(failed)),
+        concurrency=2,
+    )
+    # One flow is scheduled per dataset that was found
+    assert sorted(scheduled) == ["project/a", "project/b", "project/c"]
+    assert submitted == {"project/a": "job-project/a", "project/b": "job-project/b"}
+    assert failed == {
+        "project/missing": "Dataset could not be found",
+        "project/c": "unreachable",
+    }
+    assert cancelled is False
+    assert progress == [2, 3, 4]
+
+
+def test_schedule_per_dataset_cancelled():
+    release = threading.Event()
+    scheduled = []
+
+    def schedule(image_uri, data_uri):
+        if image_uri != "project/0":
+            release.wait(5)
+        scheduled.append(image_uri)
+        return image_uri
+
+    def progress(submitted, failed):
+        release.set()
+        raise SubmissionCancelled()
+
+    image_uris = [f"project/{i}" for i in range(10)]
+    submitted, failed, cancelled = schedule_per_dataset(
+        image_uris, lambda image_uri: image_uri, schedule, progress, concurrency=1
+    )
+    # Datasets that were not scheduled yet are skipped once cancelled,
+    # only the one already being scheduled by the worker may still finish
+    assert cancelled is True
+    assert scheduled[0] == "project/0" and len(scheduled) <= 2
+    # Flows that were scheduled nonetheless are still reported
+    assert sorted(submitted) == scheduled and failed == {}
@@ -0,0 +1,28 @@
+import os
+
+import numpy as np
+
+from utils.chunk_cache import DiskChunkCache
+
+
+def test_disk_chunk_cache(tmp_path):
+    chunk = np.arange(100, dtype=np.uint16).reshape(10, 10)
+    cache = DiskChunkCache(str(tmp_path), max_bytes=int(2.5 * (chunk.nbytes + 128)))
+    key = ("http://tiled/api/v1/metadata/scan", 0, (3, 10, 10), "<u2")
+    assert cache.get(key) is None
+
+    cache.put(key, chunk)
+    cached_chunk = cache.get(key)
+    assert isinstance(cached_chunk, np.memmap)
+    np.testing.assert_array_equal(cached_chunk, chunk)
+    # The cache is shared with other processes through the directory
+    np.testing.assert_array_equal(DiskChunkCache(str(tmp_path), 1024).get(key), chunk)
+
+    # The least recently used chunk is evicted once the size cap is exceeded
+    other_key = ("http://tiled/api/v1/metadata/scan", 1, (3, 10, 10), "<u2")
+    os.utime(cache._get_path(key), (0, 0))
+    cache.put(other_key, chunk)
+    cache.put(("http://tiled/api/v1/metadata/scan", 2, (3, 10, 10), "<u2"), chunk)
+    cache.evict()
+    assert cache.get(key) is None
+    assert cache.get(other_key) is not None
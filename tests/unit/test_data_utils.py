@@ -0,0 +1,70 @@
+import socket
+import time
+
+import httpx
+import pytest
+
+from utils.data_utils import (
+    USER_NAME,
+    TiledMaskHandler,
+    _chunk_aligned_ranges,
+    tiled_from_uri,
+)
+
+
+class _MaskContainer:
+    def __init__(self, metadata):
+        self.metadata = metadata
+
+    def __getitem__(self, key):
+        return None
+
+
+def _mask_handler(mask_client):
+    mask_handler = TiledMaskHandler(mask_tiled_uri="http://localhost:8000/api/v1")
+    mask_handler._mask_client = mask_client
+    mask_handler._connected = True
+    return mask_handler
+
+
+def test_load_annotations_from_missing_mask():
+    mask_handler = _mask_handler({})
+    data, message = mask_handler.load_annotations_from_mask("data/volume", "missing")
+    assert data is None
+    assert message == "The mask or its metadata could not be found."
+
+
+def test_load_annotations_from_mask_without_metadata():
+    mask_handler = _mask_handler(
+        {f"{USER_NAME}/data/volume/old": _MaskContainer({"mask_idx": [0]})}
+    )
+    data, _ = mask_handler.load_annotations_from_mask("data/volume", "old")
+    assert data is None
+
+
+def test_tiled_from_uri_fails_fast_on_unreachable_server():
+    # A port nothing listens on
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    started = time.monotonic()
+    with pytest.raises(httpx.ConnectError):
+        tiled_from_uri(f"http://127.0.0.1:{port}/api/v1/metadata/data")
+    # Tiled's own retries would take up to TILED_RETRY_TIMEOUT seconds
+    assert time.monotonic() - started < 2
+
+
+def test_chunk_aligned_ranges():
+    # Ranges span whole chunks, as many as fit into max_bytes
+    assert _chunk_aligned_ranges((10, 10, 10, 10), 5, 35, 1, 20) == [(0, 20), (20, 40)]
+    assert _chunk_aligned_ranges((10, 10, 10, 10), 12, 14, 1, 100) == [(10, 20)]
+    # Chunks larger than max_bytes are read in unaligned ranges of at most max_bytes
+    assert _chunk_aligned_ranges((100,), 5, 16, 10, 40) == [(5, 9), (9, 13), (13, 16)]
+    assert _chunk_aligned_ranges((5, 100, 5), 3, 108, 1, 50) == [
+        (0, 5),
+        (5, 55),
+        (55, 105),
+        (105, 110),
+    ]
+    # Slices larger than max_bytes are read one at a time
+    assert _chunk_aligned_ranges((4,), 0, 2, 100, 10) == [(0, 1), (1, 2)]
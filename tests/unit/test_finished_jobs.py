@@ -0,0 +1,64 @@
+from enum import Enum
+
+from utils.finished_jobs import FinishedJobCache, is_completed_state
+
+
+class _StateType(Enum):
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+class _State:
+    """Stand-in for a Prefect State, whose repr is not the name of its type"""
+
+    def __init__(self, state_type):
+        self.type = state_type
+
+    def __repr__(self):
+        return f"{self.type.value.capitalize()}(message=None)"
+
+    def is_completed(self):
+        return self.type == _StateType.COMPLETED
+
+
+def test_is_completed_state():
+    assert is_completed_state(_State(_StateType.COMPLETED))
+    assert not is_completed_state(_State(_StateType.FAILED))
+    assert is_completed_state(_StateType.COMPLETED)
+    assert is_completed_state("COMPLETED")
+    assert not is_completed_state("RUNNING")
+    assert not is_completed_state(None)
+
+
+def test_finished_job_cache():
+    states = {
+        "train": _State(_StateType.RUNNING),
+        "other": _State(_StateType.COMPLETED),
+    }
+    children = {"train": ["train-child"], "other": ["other-child"]}
+    calls = []
+
+    def get_state(job_id):
+        calls.append(job_id)
+        return states[job_id]
+
+    finished_jobs = FinishedJobCache(get_state, children.get, max_size=1)
+    # Running jobs are not finished
+    assert finished_jobs.get("train", expected_children=2) is None
+
+    # Completed jobs are only cached once all expected children were started
+    states["train"] = _State(_StateType.COMPLETED)
+    assert finished_jobs.get("train", expected_children=2)["children_flows"] == [
+        "train-child"
+    ]
+    children["train"].append("inference-child")
+    finished_job = finished_jobs.get("train", expected_children=2)
+    assert finished_job["children_flows"] == ["train-child", "inference-child"]
+    assert finished_jobs.get("train", expected_children=2) is finished_job
+    assert calls == ["train"] * 3
+
+    # Only the jobs used last are kept
+    finished_jobs.get("other")
+    assert finished_jobs.get("train", expected_children=2) is not finished_job
+    assert calls == ["train"] * 3 + ["other", "train"]
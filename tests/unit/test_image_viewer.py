@@ -0,0 +1,30 @@
+from callbacks.image_viewer import locally_store_annotations
+
+# A closed square with redundant vertices on its edges
+DENSE_PATH = "M0,0L5,0L10,0L10,5L10,10L5,10L0,10L0,5Z"
+
+
+def test_locally_store_annotations_only_simplifies_new_paths():
+    annotation_class = {
+        "class_id": 1,
+        "color": "rgb(255,0,0)",
+        "is_visible": True,
+        "annotations": {},
+    }
+    stored_shape = {"type": "path", "path": DENSE_PATH, "name": "1", "line": {}}
+    new_shape = {"type": "path", "path": DENSE_PATH, "line": {"color": "rgb(255,0,0)"}}
+    fig = {"layout": {"shapes": [stored_shape, new_shape]}}
+
+    all_annotation_class_store, _, _, _ = locally_store_annotations(
+        {"shapes": fig["layout"]["shapes"]},
+        1,
+        {"view": {}},
+        [annotation_class],
+        fig,
+        {},
+    )
+    stored, drawn = all_annotation_class_store[0]["annotations"]["0"]
+    # Stored and imported paths are kept as they are, only the new stroke is simplified
+    assert stored["path"] == DENSE_PATH
+    assert drawn["path"] == "M0.00,0.00L10.00,0.00L10.00,10.00L0.00,10.00Z"
+    assert drawn["name"] == "1"
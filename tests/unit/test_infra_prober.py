@@ -0,0 +1,29 @@
+import threading
+
+from utils.infra_prober import InfraStateProber
+
+
+def _raise():
+    raise ConnectionError("unreachable")
+
+
+def test_infra_state_prober():
+    release = threading.Event()
+    prober = InfraStateProber(
+        {
+            "tiled_data_ready": lambda: True,
+            "prefect_ready": _raise,
+            "mlflow_ready": release.wait,
+        },
+        timeout=0.1,
+    )
+    infra_state = prober.probe()
+    assert infra_state["tiled_data_ready"] is True
+    assert infra_state["prefect_ready"] is False
+    # Hanging checks are reported as not ready
+    assert infra_state["mlflow_ready"] is False
+    assert infra_state["any_infra_down"] is True
+
+    release.set()
+    infra_state = prober.probe()
+    assert infra_state["mlflow_ready"] is True
@@ -0,0 +1,36 @@
+from utils.job_poller import JobPoller
+
+
+def test_job_poller():
+    job_poller = JobPoller(interval=3600)
+    calls = []
+    jobs = [{"label": "🕑 DLSIA ABC", "value": "uid0001"}]
+
+    def query():
+        calls.append(1)
+        return list(jobs)
+
+    job_list = job_poller.get(("train",), query)
+    assert job_list["data"] == jobs
+    assert job_list["version"] == JobPoller.get_version(jobs)
+    # Further requests are served from the cache
+    assert job_poller.get(("train",), query) == job_list
+    assert len(calls) == 1
+
+    assert job_poller.poll() == []
+    assert job_poller.wait_for_change(0, timeout=0) == (0, [])
+    jobs[0] = {"label": "✅ DLSIA ABC", "value": "uid0001"}
+    assert job_poller.poll() == [("train",)]
+    assert job_poller.wait_for_change(0, timeout=0) == (1, [("train",)])
+    assert job_poller.get(("train",), query)["version"] != job_list["version"]
+
+
+def test_job_poller_errors():
+    job_poller = JobPoller(interval=3600)
+
+    def query():
+        raise ConnectionError("unreachable")
+
+    job_list = job_poller.get(("train",), query)
+    assert job_list["error"] is True
+    assert job_list["version"] is None
@@ -0,0 +1,99 @@
+import threading
+import time
+import uuid
+
+from utils.job_submissions import JobSubmissionManager
+
+
+def _wait_until_finished(manager, submission_id):
+    for _ in range(100):
+        status = manager.get_status(submission_id)
+        if status["finished_at"] is not None:
+            return status
+        time.sleep(0.01)
+    raise TimeoutError(submission_id)
+
+
+def test_job_submission_manager(tmp_path):
+    manager = JobSubmissionManager(str(tmp_path), max_workers=2)
+    # Another worker process of the app sharing the status directory
+    other_manager = JobSubmissionManager(str(tmp_path), max_workers=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def submit_job(progress, value):
+        progress(1, "Exporting...")
+        started.set()
+        release.wait(5)
+        progress(2, "Scheduling...", total_steps=3)
+        return value
+
+    submission_id = manager.submit(submit_job, "job-uid", total_steps=2)
+    started.wait(5)
+    status = other_manager.get_status(submission_id)
+    assert status["state"] == "running"
+    assert status["step"] == 1 and status["message"] == "Exporting..."
+    assert status["total_steps"] == 2
+    release.set()
+    status = _wait_until_finished(other_manager, submission_id)
+    assert status["state"] == "done" and status["result"] == "job-uid"
+    assert status["step"] == 2 and status["total_steps"] == 3
+    # Finished submissions can not be cancelled anymore
+    assert other_manager.cancel(submission_id) is False
+
+    # Cancelled submissions stop at their next step, also when cancelled by another worker
+    started.clear()
+    release.clear()
+    submission_id = manager.submit(submit_job, "job-uid", total_steps=2)
+    started.wait(5)
+    assert other_manager.cancel(submission_id) is True
+    release.set()
+    status = _wait_until_finished(manager, submission_id)
+    assert status["state"] == "cancelled" and status["result"] is None
+
+    def fail_job(progress):
+        raise ConnectionError("unreachable")
+
+    status = _wait_until_finished(manager, manager.submit(fail_job))
+    assert status["state"] == "failed" and status["error"] == "unreachable"
+
+    # Ids that were not created by submit are not known
+    assert manager.get_status("../job-submissions") is None
+    assert manager.cancel("../job-submissions") is False
+
+
+def test_job_submission_manager_expiry(tmp_path):
+    manager = JobSubmissionManager(str(tmp_path), ttl=0.05)
+    release = threading.Event()
+
+    def submit_job(progress, value):
+        release.wait(5)
+        return value
+
+    running_id = manager.submit(submit_job, "running-job-uid")
+    finished_id = manager.submit(lambda progress: {"job_uid": "job-uid"})
+    assert _wait_until_finished(manager, finished_id)["result"] == {
+        "job_uid": "job-uid"
+    }
+    time.sleep(0.1)
+
+    # Statuses are dropped on the next submission once they finished ttl seconds ago,
+    # statuses of running submissions are kept however long they take
+    other_id = manager.submit(lambda progress: "other-job-uid")
+    assert manager.get_status(finished_id) is None
+    assert manager.get_status(running_id)["finished_at"] is None
+    release.set()
+    assert _wait_until_finished(manager, running_id)["result"] == "running-job-uid"
+    assert _wait_until_finished(manager, other_id)["result"] == "other-job-uid"
+
+
+def test_job_submission_manager_json_results(tmp_path):
+    manager = JobSubmissionManager(str(tmp_path))
+    # Results are stored as JSON, other results fail the submission
+    submission_id = manager.submit(lambda progress: object())
+    status = _wait_until_finished(manager, submission_id)
+    assert status["state"] == "failed" and status["result"] is None
+    # Status files that can not be read are not known
+    submission_id = str(uuid.uuid4())
+    (tmp_path / f"{submission_id}.json").write_bytes(b"\x80\x04K\x01.")
+    assert manager.get_status(submission_id) is None
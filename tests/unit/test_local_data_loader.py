@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import numpy as np
+import tifffile
+
+from utils import local_data_loader
+from utils.local_data_loader import LocalDataLoader
+
+
+def test_local_data_loader_tiff(tmp_path):
+    volume = np.arange(3 * 4 * 5, dtype=np.uint16).reshape(3, 4, 5)
+    tifffile.imwrite(tmp_path / "volume.tif", volume, photometric="minisblack")
+    (tmp_path / "stack").mkdir()
+    for idx, image in enumerate(volume):
+        tifffile.imwrite(tmp_path / "stack" / f"image_{idx}.tif", image)
+
+    data_loader = LocalDataLoader(
+        tmp_path, data_tiled_uri="http://localhost:8000/api/v1/metadata/data"
+    )
+    assert data_loader.check_dataloader_ready()
+    assert data_loader.get_data_project_names() == ["stack", "volume"]
+    assert data_loader.search_data_project_names("VOL") == ["volume"]
+    assert data_loader.get_base_uri_initial_path() == (
+        "http://localhost:8000/api/v1",
+        "data",
+    )
+    # Keys follow `tiled serve directory`, without file extensions
+    for trimmed_uri in ["volume", "stack"]:
+        assert data_loader.get_data_shape_by_trimmed_uri(trimmed_uri) == (3, 4, 5)
+        np.testing.assert_array_equal(
+            data_loader.get_data_sequence_slice(trimmed_uri, 1), volume[1]
+        )
+    assert data_loader.get_data_uri_by_trimmed_uri("volume") == (
+        "http://localhost:8000/api/v1/metadata/data/volume"
+    )
+    assert data_loader.get_data_shape_by_trimmed_uri("missing") is None
+
+
+def test_local_data_loader_rejects_paths_outside_data_dir(tmp_path):
+    volume = np.zeros((2, 3, 4), dtype=np.uint8)
+    tifffile.imwrite(tmp_path / "outside.tif", volume, photometric="minisblack")
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    tifffile.imwrite(data_dir / "inside.tif", volume, photometric="minisblack")
+
+    data_loader = LocalDataLoader(data_dir)
+    assert data_loader.get_data_shape_by_trimmed_uri("inside") == (2, 3, 4)
+    assert data_loader.get_data_shape_by_trimmed_uri("../outside") is None
+    assert data_loader.get_data_uri_by_trimmed_uri("../outside") is None
+
+
+def test_local_data_loader_data_uri_points_to_array(tmp_path, monkeypatch):
+    # An HDF5 file with the NXtomoproc layout, read through a stand-in for h5py
+    (tmp_path / "scan.nxs").touch()
+    volume = np.zeros((2, 3, 4), dtype=np.uint8)
+    monkeypatch.setattr(
+        local_data_loader,
+        "h5py",
+        SimpleNamespace(
+            File=lambda path, mode: {"entry/data/data": volume},
+            Dataset=type("Dataset", (), {}),
+        ),
+    )
+
+    data_loader = LocalDataLoader(
+        tmp_path, data_tiled_uri="http://localhost:8000/api/v1/metadata/data"
+    )
+    assert data_loader.get_data_shape_by_trimmed_uri("scan") == (2, 3, 4)
+    # Like TiledDataLoader, the uri addresses the array within the file
+    assert data_loader.get_data_uri_by_trimmed_uri("scan") == (
+        "http://localhost:8000/api/v1/metadata/data/scan/entry/data/data"
+    )
+    data_loader = LocalDataLoader(tmp_path)
+    assert data_loader.get_data_uri_by_trimmed_uri("scan") == (
+        f"{(tmp_path / 'scan.nxs').resolve().as_uri()}#entry/data/data"
+    )
@@ -0,0 +1,107 @@
+import json
+import queue
+import threading
+import time
+
+import pytest
+
+from utils.model_registry import ModelRegistry
+
+
+class _TestRegistry(ModelRegistry):
+    def __init__(self, load_models, **kwargs):
+        super().__init__(refresh_interval=3600, **kwargs)
+        self._load_models = load_models
+
+    def load_models(self):
+        return self._load_models()
+
+
+def test_model_registry_serves_seed_until_refreshed(tmp_path):
+    seed_path = tmp_path / "models.json"
+    seed_path.write_text(
+        json.dumps(
+            {
+                "contents": [
+                    {"model_name": "seed", "type": "segmentation"},
+                    {"model_name": "other", "type": "classification"},
+                ]
+            }
+        )
+    )
+    snapshot_path = tmp_path / "snapshot.json"
+    release = threading.Event()
+
+    def load_models():
+        release.wait()
+        return {"mlflow": {"model_name": "mlflow", "gui_parameters": []}}
+
+    registry = _TestRegistry(
+        load_models,
+        snapshot_path=str(snapshot_path),
+        seed_path=str(seed_path),
+        model_type="segmentation",
+    )
+    # A slow model source does not block the first access
+    assert registry.modelname_list == ["seed"]
+    assert registry["seed"]["model_name"] == "seed"
+
+    release.set()
+    registry._first_refresh.wait(5)
+    assert registry.modelname_list == ["mlflow"]
+    # Refreshed definitions are written to the snapshot for the next cold start
+    assert json.loads(snapshot_path.read_text()) == registry.get_models()
+
+
+def test_model_registry_keeps_models_on_failed_refresh(tmp_path):
+    snapshot_path = tmp_path / "snapshot.json"
+    snapshot_path.write_text(json.dumps({"cached": {"model_name": "cached"}}))
+    registry = _TestRegistry(dict, snapshot_path=str(snapshot_path))
+    assert registry.modelname_list == ["cached"]
+    assert registry.refresh() is False
+    assert registry.modelname_list == ["cached"]
+
+
+def test_model_registry_background_refresh(tmp_path):
+    snapshot_path = tmp_path / "snapshot.json"
+    results = queue.Queue()
+    calls = []
+
+    def load_models():
+        calls.append(1)
+        result = results.get(timeout=5)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def wait_for(condition):
+        for _ in range(500):
+            if condition():
+                return
+            time.sleep(0.01)
+        raise TimeoutError()
+
+    registry = _TestRegistry(load_models, snapshot_path=str(snapshot_path))
+    registry.refresh_interval = 0
+    results.put({"first": {"model_name": "first"}})
+    registry.start()
+    wait_for(lambda: registry.modelname_list == ["first"])
+
+    # A failing model source keeps the previous definitions and snapshot
+    results.put(ConnectionError("unreachable"))
+    wait_for(lambda: len(calls) == 3)
+    assert registry.modelname_list == ["first"]
+    assert json.loads(snapshot_path.read_text()) == {"first": {"model_name": "first"}}
+
+    # The next successful refresh swaps in the new definitions
+    results.put({"second": {"model_name": "second"}})
+    wait_for(lambda: registry.modelname_list == ["second"])
+    wait_for(
+        lambda: json.loads(snapshot_path.read_text())
+        == {"second": {"model_name": "second"}}
+    )
+
+
+def test_model_registry_requires_load_models(tmp_path):
+    with pytest.raises(TypeError):
+        ModelRegistry(snapshot_path=str(tmp_path / "snapshot.json"))
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from utils.plot_utils import get_intensity_percentiles, normalize_to_uint8
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.uint16, np.int16, np.float32])
+def test_normalize_to_uint8(dtype):
+    rng = np.random.default_rng(0)
+    info = np.iinfo(dtype) if np.issubdtype(dtype, np.integer) else np.finfo(dtype)
+    image = rng.integers(
+        max(info.min, -1000), min(info.max, 4000), size=(64, 48)
+    ).astype(dtype)
+
+    low, high = np.percentile(image, [1, 99])
+    np.testing.assert_allclose(get_intensity_percentiles(image), (low, high))
+
+    expected = np.clip((image - low) / (high - low), 0, 1) * 255
+    normalized = normalize_to_uint8(image)
+    assert normalized.dtype == np.uint8
+    assert normalized.shape == image.shape
+    assert np.abs(normalized - expected).max() <= 0.5 + 1e-3
+
+
+def test_normalize_constant_image():
+    image = np.full((4, 4), 7, dtype=np.uint16)
+    np.testing.assert_array_equal(normalize_to_uint8(image), 0)
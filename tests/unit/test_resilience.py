@@ -0,0 +1,75 @@
+import httpx
+import pytest
+
+from utils import resilience
+from utils.resilience import CircuitBreaker, CircuitOpenError
+
+
+def _fail():
+    raise ConnectionError("unreachable")
+
+
+def test_circuit_breaker():
+    circuit_breaker = CircuitBreaker("tiled", failure_threshold=2, reset_timeout=0)
+    assert circuit_breaker.call(lambda: 1) == 1
+    # Requests that reached the service do not count as failures
+    with pytest.raises(KeyError):
+        circuit_breaker.call(lambda: {}["missing"])
+    assert circuit_breaker.get_metrics()["state"] == "closed"
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            circuit_breaker.call(_fail)
+    assert circuit_breaker.state == "open"
+    assert circuit_breaker.get_metrics()["times_opened"] == 1
+
+    # After the reset timeout, a single successful trial call closes the circuit
+    assert circuit_breaker.get_metrics()["state"] == "half-open"
+    assert circuit_breaker.call(lambda: 2) == 2
+    assert circuit_breaker.state == "closed"
+
+
+def test_circuit_breaker_fails_fast_while_open():
+    circuit_breaker = CircuitBreaker("prefect", failure_threshold=1, reset_timeout=60)
+    with pytest.raises(ConnectionError):
+        circuit_breaker.call(_fail)
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.call(lambda: 1)
+    assert circuit_breaker.get_metrics()["rejected_calls"] == 1
+
+
+def test_resilient_call_counts_one_failure_per_call(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_INITIAL_WAIT", 0)
+    monkeypatch.setattr(resilience, "RETRY_MAX_WAIT", 0)
+    circuit_breaker = CircuitBreaker("tiled", failure_threshold=2, reset_timeout=60)
+    monkeypatch.setitem(resilience.circuit_breakers, "tiled", circuit_breaker)
+    attempts = []
+
+    def fail():
+        attempts.append(1)
+        raise ConnectionError("unreachable")
+
+    with pytest.raises(ConnectionError):
+        resilience.resilient_call("tiled", fail)
+    # All attempts of the call were made, but only count as one failure
+    assert len(attempts) == resilience.RETRY_ATTEMPTS
+    assert circuit_breaker.get_metrics()["failures"] == 1
+    assert circuit_breaker.state == "closed"
+
+
+def test_resilient_call_does_not_retry_client_errors(monkeypatch):
+    circuit_breaker = CircuitBreaker("tiled", failure_threshold=1, reset_timeout=60)
+    monkeypatch.setitem(resilience.circuit_breakers, "tiled", circuit_breaker)
+    attempts = []
+
+    def not_found():
+        attempts.append(1)
+        request = httpx.Request("GET", "http://tiled/api/v1/metadata/missing")
+        raise httpx.HTTPStatusError(
+            "404", request=request, response=httpx.Response(404, request=request)
+        )
+
+    with pytest.raises(httpx.HTTPStatusError):
+        resilience.resilient_call("tiled", not_found)
+    assert len(attempts) == 1
+    assert circuit_breaker.state == "closed"
@@ -1,22 +1,228 @@
+import functools
 import hashlib
 import io
+import os
+import re
 import zipfile
 
 import canonicaljson
 import numpy as np
 import scipy.sparse as sp
 from matplotlib.path import Path
-from skimage import draw
+from skimage import draw, measure
+from skimage.measure import approximate_polygon
 from svgpathtools import parse_path
 
+# Maximum distance in pixels between a closed freeform path drawn by the user and its
+# simplified version stored in the class stores, a tolerance of 0 disables simplification
+PATH_SIMPLIFICATION_TOLERANCE = float(os.getenv("PATH_SIMPLIFICATION_TOLERANCE", 0.5))
+
+# Tolerance in pixels for simplifying the outlines traced from imported masks,
+# tolerances of 0.35 pixels and above may cut off corners of pixelated regions
+MASK_IMPORT_TOLERANCE = float(os.getenv("MASK_IMPORT_TOLERANCE", 0.25))
+
+# Number of parsed paths to keep in memory, paths are re-parsed on every export otherwise
+PATH_VERTICES_CACHE_SIZE = int(os.getenv("PATH_VERTICES_CACHE_SIZE", 4096))
+
+# Plotly's closed path tool only generates straight line segments (M, L and Z commands)
+PLOTLY_PATH_PATTERN = re.compile(r"^[MLZ0-9eE.,+\-\s]*$")
+PLOTLY_PATH_SEPARATORS = str.maketrans("MLZ,", "    ")
+PLOTLY_PATH_NUMBER = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+
+
+@functools.lru_cache(maxsize=PATH_VERTICES_CACHE_SIZE)
+def parse_plotly_path(path):
+    """
+    Returns the vertices of a path drawn with Plotly's closed path tool as a read-only
+    float32 array of shape (N, 2), or None if the path contains commands other than M, L and Z,
+    malformed numbers, or no complete coordinate pairs.
+    All numbers are parsed in a single pass by numpy instead of building an object per segment.
+    """
+    if not PLOTLY_PATH_PATTERN.match(path):
+        return None
+    numbers = path.translate(PLOTLY_PATH_SEPARATORS).split()
+    if (
+        len(numbers) == 0
+        or len(numbers) % 2
+        or not all(PLOTLY_PATH_NUMBER.fullmatch(number) for number in numbers)
+    ):
+        return None
+    vertices = np.array(numbers, dtype=float).astype(np.float32).reshape(-1, 2)
+    # Results are shared between callers through the cache
+    vertices.setflags(write=False)
+    return vertices
+
+
+def split_plotly_subpaths(path):
+    """
+    Splits a path into its closed subpaths, each starting with an M command.
+    Paths imported from masks hold a region and its holes as separate subpaths.
+    """
+    return ["M" + subpath for subpath in path.split("M")[1:]]
+
+
+def _vertices_to_plotly_path(vertices):
+    """
+    Returns a closed SVG path in the same format as generated by Plotly's closed path tool
+    """
+    return "M" + "L".join(f"{x:.2f},{y:.2f}" for x, y in vertices) + "Z"
+
+
+def simplify_closed_path(path, tolerance=PATH_SIMPLIFICATION_TOLERANCE):
+    """
+    Simplifies a closed freeform path using the Douglas-Peucker algorithm,
+    such that no removed vertex deviates more than `tolerance` pixels from the simplified path.
+    Paths that cannot be parsed or simplified any further, or with several subpaths,
+    are returned unchanged.
+    """
+    if tolerance <= 0 or path.count("M") > 1:
+        return path
+    vertices = parse_plotly_path(path)
+    if vertices is None or len(vertices) <= 3:
+        return path
+    # approximate_polygon treats the polygon as closed if first and last vertex coincide
+    simplified = approximate_polygon(np.vstack([vertices, vertices[:1]]), tolerance)
+    simplified = simplified[:-1]
+    if len(simplified) < 3 or len(simplified) == len(vertices):
+        return path
+    return _vertices_to_plotly_path(simplified)
+
+
+def count_slice_annotations(annotation_store, image_idx):
+    """
+    Returns the number of shapes per class id on the given slice,
+    classes without shapes on that slice are omitted.
+    """
+    return {
+        str(annotation_class["class_id"]): len(
+            annotation_class["annotations"][image_idx]
+        )
+        for annotation_class in annotation_store
+        if annotation_class["annotations"].get(image_idx)
+    }
+
+
+def build_annotated_slices_index(annotation_store):
+    """
+    Builds the annotated slices index from scratch, mapping each annotated slice
+    to the number of shapes per class id, e.g. {"12": {"0": 3, "2": 1}}.
+    This is only needed when class stores are replaced as a whole (e.g. on load),
+    otherwise the index is updated incrementally per slice.
+    """
+    index = {}
+    for annotation_class in annotation_store:
+        for image_idx, slice_data in annotation_class["annotations"].items():
+            if slice_data:
+                index.setdefault(image_idx, {})[str(annotation_class["class_id"])] = (
+                    len(slice_data)
+                )
+    return index
+
+
+def get_annotated_slices(annotated_slices_index):
+    """
+    Returns the sorted list of annotated slices (as string keys) from the index
+    """
+    return sorted(annotated_slices_index.keys(), key=int)
+
+
+def strip_shape_style(shape, class_id):
+    """
+    Returns the geometry of a figure shape as stored in the class stores.
+    Colors are not stored with the shape, instead the shape references its class by id
+    (through the shape name) and the class color is applied at render time.
+    """
+    shape = {key: value for key, value in shape.items() if key != "fillcolor"}
+    if "line" in shape:
+        shape["line"] = {
+            key: value for key, value in shape["line"].items() if key != "color"
+        }
+    shape["name"] = str(class_id)
+    return shape
+
+
+def get_class_styles(annotation_store):
+    """
+    Returns the style table used to render stored shapes, mapping class ids to class colors
+    for all visible classes
+    """
+    return {
+        str(annotation_class["class_id"]): annotation_class["color"]
+        for annotation_class in annotation_store
+        if annotation_class["is_visible"]
+    }
+
+
+def get_slice_shapes(annotation_store, image_idx):
+    """
+    Returns the figure shapes of all visible classes on the given slice,
+    styled with the current color of their class
+    """
+    class_styles = get_class_styles(annotation_store)
+    shapes = []
+    for annotation_class in annotation_store:
+        class_id = str(annotation_class["class_id"])
+        if class_id not in class_styles:
+            continue
+        color = class_styles[class_id]
+        for shape in annotation_class["annotations"].get(image_idx, []):
+            shapes.append(
+                {
+                    **shape,
+                    "name": class_id,
+                    "line": {**shape.get("line", {}), "color": color},
+                    "fillcolor": color,
+                }
+            )
+    return shapes
+
+
+def closed_path_shape(path, class_id):
+    """
+    Returns a figure shape for a closed path, with the same defaults as shapes drawn
+    with Plotly's closed path tool and in the format stored in the class stores
+    """
+    return {
+        "editable": True,
+        "xref": "x",
+        "yref": "y",
+        "layer": "above",
+        "opacity": 1,
+        "line": {"width": 4, "dash": "solid"},
+        "fillrule": "evenodd",
+        "type": "path",
+        "path": path,
+        "name": str(class_id),
+    }
+
+
+def mask_slice_to_shapes(mask_slice, tolerance=MASK_IMPORT_TOLERANCE):
+    """
+    Vectorizes a labeled 2D mask into closed path shapes per class id,
+    unlabeled pixels (negative values) are ignored
+    """
+    shapes = {}
+    for class_id in np.unique(mask_slice):
+        if class_id < 0:
+            continue
+        paths = ShapeConversion.array_to_closed_paths(mask_slice, class_id, tolerance)
+        if paths:
+            shapes[str(class_id)] = [
+                closed_path_shape(path, class_id) for path in paths
+            ]
+    return shapes
+
 
 class Annotations:
-    def __init__(self, annotation_store, image_shape):
+    def __init__(self, annotation_store, image_shape, annotated_slices=None):
         if annotation_store:
-            slices = []
-            for annotation_class in annotation_store:
-                slices.extend(list(annotation_class["annotations"].keys()))
-            slices = set(slices)
+            if annotated_slices is None:
+                slices = []
+                for annotation_class in annotation_store:
+                    slices.extend(list(annotation_class["annotations"].keys()))
+                slices = set(slices)
+            else:
+                slices = annotated_slices
             # Slices need to be sorted to ensure that the exported mask slices
             # have the same order as the original data set
             annotations = {key: [] for key in sorted(slices, key=int)}
@@ -219,11 +425,12 @@ class ShapeConversion:
         return mask
 
     @classmethod
-    def closed_path_to_array(self, svg_data, image_shape, mask_class):
-        image_height, image_width = image_shape
-
-        # Parse the SVG path from the input string
-        path = parse_path(svg_data["path"])
+    def svg_path_to_vertices(self, svg_path):
+        """
+        Returns the vertices of an arbitrary SVG path, including the control points of curves,
+        as a (N, 2) array
+        """
+        path = parse_path(svg_path)
 
         # Create a filled polygon using matplotlib
         vertices = []
@@ -232,16 +439,32 @@ class ShapeConversion:
             if hasattr(segment, "control_points"):
                 for control_point in segment.control_points:
                     vertices.extend([control_point.real, control_point.imag])
+        return np.array(vertices).reshape(-1, 2)
 
-        # Create a matplotlib Path object from the vertices
-        polygon_path = Path(np.array(vertices).reshape(-1, 2))
+    @classmethod
+    def closed_path_to_array(self, svg_data, image_shape, mask_class):
+        """
+        Rasterizes a closed path. Paths with several subpaths (e.g. a region and its holes)
+        are filled following the even-odd rule.
+        """
+        image_height, image_width = image_shape
+
+        # Parse the SVG path from the input string, paths generated by Plotly only
+        # contain straight lines, anything else falls back to svgpathtools
+        subpaths = [
+            parse_plotly_path(p) for p in split_plotly_subpaths(svg_data["path"])
+        ]
+        if len(subpaths) == 0 or any(vertices is None for vertices in subpaths):
+            subpaths = [self.svg_path_to_vertices(svg_data["path"])]
 
         # Generate a grid of points covering the whole image
         x, y = np.meshgrid(np.arange(0, image_width), np.arange(0, image_height))
         points = np.column_stack((x.ravel(), y.ravel()))
 
-        # Check if each point is inside the polygon
-        is_inside = polygon_path.contains_points(points)
+        # Check if each point is inside an odd number of subpaths
+        is_inside = np.zeros(len(points), dtype=bool)
+        for vertices in subpaths:
+            is_inside ^= Path(vertices).contains_points(points)
 
         # Reshape the result back into the 2D shape
         mask = is_inside.reshape(image_height, image_width).astype(np.int8)
@@ -250,3 +473,44 @@ class ShapeConversion:
         mask[mask == 0] = -1
         mask[mask == 1] = mask_class
         return mask
+
+    @classmethod
+    def array_to_closed_paths(self, mask, mask_class, tolerance=MASK_IMPORT_TOLERANCE):
+        """
+        Traces the outlines of all regions labeled with mask_class in a 2D mask and returns
+        them as simplified closed paths in the format generated by Plotly's closed path tool,
+        one path per region. Holes of a region are appended to its path as subpaths of
+        opposite orientation, such that they stay unlabeled when converting back to a mask.
+        """
+        # Pad the mask so that regions touching the image border result in closed contours
+        region = np.pad(mask == mask_class, 1).astype(np.uint8)
+        outlines = []
+        holes = []
+        for contour in measure.find_contours(region, 0.5, positive_orientation="high"):
+            # Outer boundaries run counter-clockwise in (row, column) coordinates, holes clockwise
+            rows, columns = contour[:, 0], contour[:, 1]
+            signed_area = np.dot(columns[:-1], rows[1:]) - np.dot(
+                rows[:-1], columns[1:]
+            )
+            if tolerance > 0:
+                contour = approximate_polygon(contour, tolerance)
+            # Contours are closed by repeating the first vertex, Plotly paths are closed with Z
+            vertices = contour[:-1, ::-1] - 1
+            if len(vertices) < 3:
+                continue
+            if signed_area > 0:
+                holes.append(vertices)
+            else:
+                outlines.append((abs(signed_area), vertices, []))
+
+        # Each hole belongs to the smallest region enclosing it
+        outlines_by_area = sorted(outlines, key=lambda outline: outline[0])
+        for hole in holes:
+            for _, vertices, region_holes in outlines_by_area:
+                if Path(vertices).contains_point(hole[0]):
+                    region_holes.append(hole)
+                    break
+        return [
+            "".join(_vertices_to_plotly_path(v) for v in [vertices] + region_holes)
+            for _, vertices, region_holes in outlines
+        ]
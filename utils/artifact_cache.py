@@ -0,0 +1,101 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from utils.chunk_cache import evict_least_recently_used
+
+
+class ArtifactCache:
+    """
+    Content-addressed local cache of MLflow run artifacts, which are immutable.
+    Artifact files are stored once per content hash under blobs/, and references from
+    (run id, artifact path) to the content hash are stored under refs/.
+    The total size of the blobs is capped by evicting the least recently used ones.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.blobs_dir = os.path.join(cache_dir, "blobs")
+        self.refs_dir = os.path.join(cache_dir, "refs")
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.refs_dir, exist_ok=True)
+        # Locks per reference, such that concurrent requests download an artifact only once
+        self._download_locks = {}
+        self._lock = threading.Lock()
+
+    def _get_ref_path(self, run_id, artifact_path):
+        ref_key = hashlib.sha256(f"{run_id}/{artifact_path}".encode("utf-8"))
+        return os.path.join(self.refs_dir, ref_key.hexdigest())
+
+    def _lookup(self, ref_path):
+        """
+        Returns the blob path, content hash and creation time of a cached artifact,
+        or None if it is not cached
+        """
+        try:
+            with open(ref_path, "r") as f:
+                content_hash = f.read().strip()
+            created = os.path.getmtime(ref_path)
+        except FileNotFoundError:
+            return None
+        blob_path = os.path.join(self.blobs_dir, content_hash)
+        try:
+            # Mark the blob as recently used
+            os.utime(blob_path)
+        except FileNotFoundError:
+            return None
+        return blob_path, content_hash, created
+
+    @staticmethod
+    def _hash_file(path):
+        content_hash = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                content_hash.update(block)
+        return content_hash.hexdigest()
+
+    def get(self, run_id, artifact_path, download):
+        """
+        Returns the local path, content hash and creation time (as a timestamp) of the artifact.
+        On a cache miss, download(destination_dir) is called to download the artifact,
+        and is expected to return the path of the downloaded file.
+        """
+        ref_path = self._get_ref_path(run_id, artifact_path)
+        cached = self._lookup(ref_path)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            download_lock = self._download_locks.setdefault(ref_path, threading.Lock())
+        try:
+            with download_lock:
+                cached = self._lookup(ref_path)
+                if cached is not None:
+                    return cached
+                with tempfile.TemporaryDirectory(dir=self.cache_dir) as tmp_dir:
+                    downloaded_path = download(tmp_dir)
+                    if not os.path.isfile(downloaded_path):
+                        raise IsADirectoryError(f"{artifact_path} is not a file.")
+                    content_hash = self._hash_file(downloaded_path)
+                    blob_path = os.path.join(self.blobs_dir, content_hash)
+                    if not os.path.exists(blob_path):
+                        # Make room before adding the blob, so that it is not evicted right away
+                        evict_least_recently_used(
+                            self.blobs_dir,
+                            max(self.max_bytes - os.path.getsize(downloaded_path), 0),
+                        )
+                        shutil.move(downloaded_path, blob_path)
+                fd, tmp_ref_path = tempfile.mkstemp(dir=self.refs_dir, suffix=".tmp")
+                with os.fdopen(fd, "w") as f:
+                    f.write(content_hash)
+                os.replace(tmp_ref_path, ref_path)
+        finally:
+            # Also drop the lock of failed downloads, such that they do not pile up,
+            # unless a newer download already replaced it
+            with self._lock:
+                if self._download_locks.get(ref_path) is download_lock:
+                    del self._download_locks[ref_path]
+        return blob_path, content_hash, os.path.getmtime(ref_path)
@@ -0,0 +1,68 @@
+import threading
+
+from utils.startup_timing import startup_timer
+
+
+class LazyClientRegistry:
+    """
+    Registry of backend clients shared by all modules of a process. Clients are created
+    by their factory on first use instead of at import, so that worker processes boot
+    without waiting for backends. Failed creations are not cached, and are retried on
+    the next use.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._clients = {}
+        self._lock = threading.Lock()
+        # Locks per client, such that a client is only created once
+        self._create_locks = {}
+
+    def register(self, name, factory):
+        with self._lock:
+            self._factories[name] = factory
+            self._create_locks[name] = threading.Lock()
+
+    def get(self, name):
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+        with self._create_locks[name]:
+            client = self._clients.get(name)
+            if client is None:
+                with startup_timer.step(f"create {name} client"):
+                    client = self._factories[name]()
+                self._clients[name] = client
+        return client
+
+    def reset(self, name):
+        """
+        Drops the client, such that it is created again on its next use
+        """
+        with self._create_locks[name]:
+            self._clients.pop(name, None)
+
+
+# The Tiled clients are not registered here, but connected lazily by their loaders in
+# utils/data_utils.py: reconnecting also clears the mask container cache of the mask
+# loader, and a failed connection is kept as None until check_dataloader_ready or
+# check_mask_handler_ready retries it, so that callbacks do not wait on an unreachable
+# server at every access.
+backend_clients = LazyClientRegistry()
+
+
+def _create_mlflow_model_client():
+    # Imported on first use, as importing mlflow takes a large part of the boot time
+    from mlex_utils.mlflow_utils.mlflow_model_client import MLflowModelClient
+
+    return MLflowModelClient()
+
+
+backend_clients.register("mlflow_model", _create_mlflow_model_client)
+
+
+def get_mlflow_model_client():
+    """
+    Returns the MLflow model client shared by all modules of this process
+    """
+    return backend_clients.get("mlflow_model")
@@ -0,0 +1,54 @@
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.job_submissions import SubmissionCancelled
+
+
+def collect_dataset_uris(image_uris, search_query, search, max_datasets):
+    """
+    Returns the selected datasets followed by the datasets matching search_query,
+    found with search(search_query, limit), without duplicates and at most max_datasets
+    """
+    if search_query:
+        image_uris = image_uris + search(search_query, limit=max_datasets)
+    return list(dict.fromkeys(image_uris))[:max_datasets]
+
+
+def schedule_per_dataset(image_uris, get_data_uri, schedule, progress, concurrency=4):
+    """
+    Resolves the data uri of every dataset with get_data_uri(image_uri) and calls
+    schedule(image_uri, data_uri) once for each dataset that was found, with at most
+    concurrency requests at a time. progress(submitted, failed) is called after each
+    scheduled dataset, and stops scheduling further datasets if it raises
+    SubmissionCancelled.
+    Returns the results of schedule and the errors per dataset, and whether the
+    scheduling was cancelled.
+    """
+    submitted = {}
+    failed = {}
+    cancelled = False
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        data_uris = dict(zip(image_uris, executor.map(get_data_uri, image_uris)))
+        futures = {}
+        for image_uri, data_uri in data_uris.items():
+            if data_uri is None:
+                failed[image_uri] = "Dataset could not be found"
+                continue
+            futures[executor.submit(schedule, image_uri, data_uri)] = image_uri
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            image_uri = futures[future]
+            try:
+                submitted[image_uri] = future.result()
+            except Exception as e:
+                traceback.print_exc()
+                failed[image_uri] = str(e)
+            if not cancelled:
+                try:
+                    progress(submitted, failed)
+                except SubmissionCancelled:
+                    cancelled = True
+                    for other_future in futures:
+                        other_future.cancel()
+    return submitted, failed, cancelled
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import traceback
+
+import numpy as np
+
+
+def evict_least_recently_used(directory, max_bytes, suffix=""):
+    """
+    Removes the least recently used files with the given suffix in the directory, based on
+    their modification time, until their total size is below max_bytes.
+    Files are evicted down to 90% of max_bytes, to avoid evicting on every subsequent write.
+    """
+    entries = []
+    total_bytes = 0
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not entry.is_file() or not entry.name.endswith(suffix):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total_bytes += stat.st_size
+    if total_bytes <= max_bytes:
+        return
+    target_bytes = int(max_bytes * 0.9)
+    for _, size, path in sorted(entries):
+        if total_bytes <= target_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_bytes -= size
+
+
+class DiskChunkCache:
+    """
+    Persistent cache of array chunks (e.g. single slices of a Tiled volume) on local disk.
+    Every chunk is stored as a .npy file named by the hash of its key, and is read back
+    memory-mapped. Files are written atomically, so the cache can be shared by all worker
+    processes on a host and survives restarts. The total size is capped by evicting the
+    least recently used files, based on their modification time, which is refreshed on reads.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # Bytes written since the size of the cache was last checked,
+        # None if it has not been checked by this process yet
+        self._bytes_since_check = None
+
+    def _get_path(self, key):
+        key_hash = hashlib.sha256(
+            json.dumps(key, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.cache_dir, f"{key_hash}.npy")
+
+    def get(self, key):
+        """
+        Returns the memory-mapped chunk for the given key, or None if it is not cached
+        """
+        path = self._get_path(key)
+        try:
+            chunk = np.load(path, mmap_mode="r")
+            os.utime(path)
+            return chunk
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Corrupted or partially evicted file, drop it and fetch the chunk again
+            traceback.print_exc()
+            self._remove(path)
+            return None
+
+    def contains(self, key):
+        """
+        Returns whether a chunk is cached for the given key
+        """
+        return os.path.exists(self._get_path(key))
+
+    def put(self, key, chunk):
+        """
+        Stores the chunk under the given key, evicting old chunks if the size cap is exceeded
+        """
+        chunk = np.asarray(chunk)
+        if chunk.nbytes > self.max_bytes:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, chunk, allow_pickle=False)
+            os.replace(tmp_path, self._get_path(key))
+        except Exception:
+            traceback.print_exc()
+            self._remove(tmp_path)
+            return
+
+        with self._lock:
+            if self._bytes_since_check is not None:
+                self._bytes_since_check += chunk.nbytes
+            # Other processes write to the same directory, so we only check the size
+            # of the whole cache once a fraction of the cap has been written by us
+            check_size = (
+                self._bytes_since_check is None
+                or self._bytes_since_check > self.max_bytes // 20
+            )
+            if check_size:
+                self._bytes_since_check = 0
+        if check_size:
+            self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used chunks until the cache is below its size cap
+        """
+        evict_least_recently_used(self.cache_dir, self.max_bytes, suffix=".npy")
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -1,31 +1,101 @@
+import importlib.util
 import json
 import os
+import tempfile
+import threading
 import traceback
-from urllib.parse import urlparse, urlunparse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse, urlunparse
 
 import httpx
 import numpy as np
 from dotenv import load_dotenv
-from mlex_utils.mlflow_utils.mlflow_algorithm_client import MlflowAlgorithmClient
-from tiled.client import from_uri
 from tiled.client.array import ArrayClient
+from tiled.client.constructors import from_context
 from tiled.client.container import Container
+from tiled.client.context import Context
+from tiled.client.decoders import SUPPORTED_DECODERS
+from tiled.client.transport import Transport
+from tiled.client.utils import handle_error, params_from_slice, retry_context
+from tiled.queries import FullText
 
-from utils.annotations import Annotations
+from utils.annotations import Annotations, mask_slice_to_shapes
+from utils.chunk_cache import DiskChunkCache
+from utils.local_data_loader import LocalDataLoader
+from utils.model_registry import ModelRegistry
+from utils.resilience import resilient_call
+from utils.startup_timing import startup_timer
 
 load_dotenv()
 
 DATA_TILED_URI = os.getenv("DATA_TILED_URI")
 DATA_TILED_API_KEY = os.getenv("DATA_TILED_API_KEY")
+# If given, data is read directly from this directory instead of through Tiled
+DATA_LOCAL_DIR = os.getenv("DATA_LOCAL_DIR")
 MASK_TILED_URI = os.getenv("MASK_TILED_URI")
 MASK_TILED_API_KEY = os.getenv("MASK_TILED_API_KEY")
 SEG_TILED_URI = os.getenv("SEG_TILED_URI")
 SEG_TILED_API_KEY = os.getenv("SEG_TILED_API_KEY")
 USER_NAME = os.getenv("USER_NAME", "user1")
 
+# Connection pool and timeout settings for the HTTP client shared by all Tiled clients
+TILED_TIMEOUT = float(os.getenv("TILED_TIMEOUT", 30.0))
+TILED_CONNECT_TIMEOUT = float(os.getenv("TILED_CONNECT_TIMEOUT", 5.0))
+TILED_MAX_CONNECTIONS = int(os.getenv("TILED_MAX_CONNECTIONS", 20))
+TILED_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("TILED_MAX_KEEPALIVE_CONNECTIONS", 10))
+TILED_KEEPALIVE_EXPIRY = float(os.getenv("TILED_KEEPALIVE_EXPIRY", 60.0))
+# HTTP/2 is only used if the optional h2 package is installed
+TILED_HTTP2 = (
+    os.getenv("TILED_HTTP2", "true").lower() == "true"
+    and importlib.util.find_spec("h2") is not None
+)
+
+# Content encodings requested for binary array transfers, in order of preference.
+# Encodings the client cannot decode (blosc2 and zstd need optional packages) are skipped.
+TILED_ARRAY_ENCODINGS = [
+    encoding.strip()
+    for encoding in os.getenv("TILED_ARRAY_ENCODINGS", "blosc2,zstd,gzip").split(",")
+    if encoding.strip() in SUPPORTED_DECODERS
+]
+ARRAY_ACCEPT_ENCODING = ", ".join(
+    [
+        f"{encoding};q={1 - 0.1 * idx:.1f}"
+        for idx, encoding in enumerate(TILED_ARRAY_ENCODINGS)
+    ]
+    + ["identity;q=0.1"]
+)
+
+# Maximum size of a single request when reading ranges of slices
+TILED_BLOCK_MAX_BYTES = int(float(os.getenv("TILED_BLOCK_MAX_MB", 64)) * 1024**2)
+
+# Optional local cache of data slices, shared by all worker processes on a host
+TILED_CHUNK_CACHE_DIR = os.getenv("TILED_CHUNK_CACHE_DIR")
+TILED_CHUNK_CACHE_SIZE_GB = float(os.getenv("TILED_CHUNK_CACHE_SIZE_GB", 10.0))
+# Number of slices before and after the displayed slice that are prefetched into the cache
+TILED_PREFETCH_SLICES = int(os.getenv("TILED_PREFETCH_SLICES", 5))
+
+# Memory budget for result slices cached in each app process
+RESULT_SLICE_CACHE_MB = float(os.getenv("RESULT_SLICE_CACHE_MB", 256))
+
+# Number of children listed per request when searching projects
+DATA_PROJECT_PAGE_SIZE = int(os.getenv("DATA_PROJECT_PAGE_SIZE", 100))
+
 MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
 MLFLOW_TRACKING_USERNAME = os.getenv("MLFLOW_TRACKING_USERNAME", "")
 MLFLOW_TRACKING_PASSWORD = os.getenv("MLFLOW_TRACKING_PASSWORD", "")
+# Segmentation models are refreshed from MLflow in the background every
+# MODELS_REFRESH_INTERVAL seconds, and served from a local snapshot in the meantime,
+# which is seeded from the algorithm definitions shipped with the app
+MODELS_REFRESH_INTERVAL = float(os.getenv("MODELS_REFRESH_INTERVAL", 300.0))
+MODELS_LOAD_TIMEOUT = float(os.getenv("MODELS_LOAD_TIMEOUT", 5.0))
+MODELS_SNAPSHOT_PATH = os.getenv("MODELS_SNAPSHOT_PATH") or os.path.join(
+    tempfile.gettempdir(), "segmentation-models.json"
+)
+MODELS_SEED_PATH = os.getenv(
+    "MODELS_SEED_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "assets", "models.json"),
+)
 
 
 def _create_or_return_containers(client, container_names):
@@ -33,12 +103,13 @@ def _create_or_return_containers(client, container_names):
     Iterates through a list of container names and creates them if they do not exist.
     For example, if the container_names are ["results", "segmentation"], it will return the Tiled client for
     client["results"]["segmentation"], having created any containers that were missing.
+    Containers are looked up by key directly, instead of listing all keys of their parent.
     """
     for container_name in container_names:
-        if container_name not in client.keys():
-            client = client.create_container(key=container_name)
-        else:
+        try:
             client = client[container_name]
+        except KeyError:
+            client = client.create_container(key=container_name)
     return client
 
 
@@ -76,6 +147,186 @@ def _split_base_uri_containers(uri):
     return base_uri, container_names
 
 
+# Tiled contexts (each holding one pooled HTTP client) per (api uri, api key)
+_tiled_contexts = {}
+_tiled_contexts_lock = threading.Lock()
+
+
+def _get_tiled_context(api_uri, api_key):
+    """
+    Returns the Tiled context for the given api uri and api key, creating it on first use.
+    All clients connecting to the same server with the same api key share this context,
+    and thereby its connection pool (keep-alive connections, HTTP/2 where available).
+    """
+    key = (api_uri, api_key)
+    with _tiled_contexts_lock:
+        context = _tiled_contexts.get(key)
+        if context is None:
+            context = Context(
+                api_uri,
+                api_key=api_key,
+                timeout=httpx.Timeout(TILED_TIMEOUT, connect=TILED_CONNECT_TIMEOUT),
+            )
+            # Replace the default transport with a pooled one,
+            # keeping Tiled's transport wrapper for its custom compression encodings
+            default_transport = context.http_client._transport
+            context.http_client._transport = Transport(
+                transport=httpx.HTTPTransport(
+                    http2=TILED_HTTP2,
+                    limits=httpx.Limits(
+                        max_connections=TILED_MAX_CONNECTIONS,
+                        max_keepalive_connections=TILED_MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=TILED_KEEPALIVE_EXPIRY,
+                    ),
+                ),
+            )
+            default_transport.close()
+            _tiled_contexts[key] = context
+    return context
+
+
+def _probe_tiled_server(api_uri):
+    """
+    Raises if the Tiled server does not answer within TILED_CONNECT_TIMEOUT seconds.
+    Tiled retries failed requests internally for up to TILED_RETRY_TIMEOUT seconds,
+    which would block callbacks for that long while the server is unreachable.
+    """
+    httpx.get(
+        api_uri,
+        headers={"Cache-Control": "no-cache, no-store"},
+        timeout=TILED_CONNECT_TIMEOUT,
+        follow_redirects=True,
+    ).raise_for_status()
+
+
+def tiled_from_uri(uri, api_key=None):
+    """
+    Connects to a node on a Tiled server, like tiled's from_uri,
+    but reusing the shared connection pool of the server instead of opening a new one.
+    Fails fast if the server is unreachable, retries are left to the caller.
+    """
+    api_uri, node_path_parts = _split_base_uri_containers(uri)
+    if "/api" not in urlparse(api_uri).path:
+        # Root path of the server was given
+        api_uri = f"{api_uri.rstrip('/')}/api/v1"
+    _probe_tiled_server(api_uri)
+    context = _get_tiled_context(api_uri, api_key)
+    return from_context(context, node_path_parts=node_path_parts)
+
+
+chunk_cache = (
+    DiskChunkCache(TILED_CHUNK_CACHE_DIR, int(TILED_CHUNK_CACHE_SIZE_GB * 1024**3))
+    if TILED_CHUNK_CACHE_DIR
+    else None
+)
+# Prefetches run one at a time, so that they do not compete with interactive requests
+_prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+
+
+def read_array_slice(array_client, slice):
+    """
+    Reads a slice of a Tiled array as a raw binary buffer, negotiating a compressed content
+    encoding with the server, and decodes the response directly into a preallocated numpy array.
+    Unlike indexing the array client, only the requested slice is transferred, not whole chunks.
+    """
+    structure = array_client.structure()
+    dtype = structure.data_type.to_numpy_dtype()
+    # Shape of the slice, without allocating the full array
+    shape = np.broadcast_to(np.empty((), dtype=np.uint8), structure.shape)[slice].shape
+    data_slice = np.empty(shape, dtype=dtype)
+    if data_slice.size == 0:
+        return data_slice
+    buffer = data_slice.reshape(-1).view(np.uint8)
+
+    url_path = array_client.item["links"]["full"]
+    params = {
+        **parse_qs(urlparse(url_path).query),
+        **params_from_slice(slice),
+        "expected_shape": ",".join(map(str, shape)) if shape else "scalar",
+    }
+    headers = {
+        "Accept": "application/octet-stream",
+        "Accept-Encoding": ARRAY_ACCEPT_ENCODING,
+    }
+    for attempt in retry_context():
+        with attempt:
+            with array_client.context.http_client.stream(
+                "GET", url_path, headers=headers, params=params
+            ) as response:
+                if response.is_error:
+                    response.read()
+                    handle_error(response)
+                position = 0
+                for content in response.iter_bytes():
+                    buffer[position : position + len(content)] = np.frombuffer(
+                        content, dtype=np.uint8
+                    )
+                    position += len(content)
+            if position != buffer.size:
+                raise ValueError(
+                    f"Expected {buffer.size} bytes for slice {slice} of "
+                    f"{array_client.uri}, received {position}."
+                )
+    return data_slice
+
+
+def _chunk_aligned_ranges(chunks, start, stop, slice_nbytes, max_bytes):
+    """
+    Splits the range [start, stop) along the first axis of an array into ranges aligned to the
+    chunk boundaries of the array, given by the chunk sizes along that axis. Each range spans
+    whole chunks, as many as fit into max_bytes. Chunks that do not fit into max_bytes by
+    themselves are split into unaligned ranges within [start, stop) of at most max_bytes
+    (but at least one slice), such that reads stay within the memory bound.
+    """
+    boundaries = np.cumsum((0,) + tuple(chunks))
+    first = np.searchsorted(boundaries, start, side="right") - 1
+    last = np.searchsorted(boundaries, stop, side="left")
+    slices_per_range = max(1, max_bytes // max(slice_nbytes, 1))
+    ranges = []
+    range_start = range_stop = None
+    for idx in range(first, last):
+        chunk_start, chunk_stop = int(boundaries[idx]), int(boundaries[idx + 1])
+        # Start a new range if adding the next chunk would exceed max_bytes
+        if (
+            range_start is not None
+            and (chunk_stop - range_start) * slice_nbytes > max_bytes
+        ):
+            ranges.append((range_start, range_stop))
+            range_start = None
+        if (chunk_stop - chunk_start) * slice_nbytes > max_bytes:
+            sub_start, sub_stop = max(chunk_start, start), min(chunk_stop, stop)
+            for range_idx in range(sub_start, sub_stop, slices_per_range):
+                ranges.append((range_idx, min(range_idx + slices_per_range, sub_stop)))
+            continue
+        if range_start is None:
+            range_start = chunk_start
+        range_stop = chunk_stop
+    if range_start is not None:
+        ranges.append((range_start, range_stop))
+    return ranges
+
+
+def iter_array_slices(array_client, start, stop, max_bytes=TILED_BLOCK_MAX_BYTES):
+    """
+    Iterates over slices [start, stop) of a Tiled array along its first axis, yielding
+    (index, slice) pairs. Slices are fetched in few requests of chunk-aligned ranges,
+    and yielded as views into these blocks, without copying.
+    """
+    structure = array_client.structure()
+    stop = min(stop, structure.shape[0])
+    if start >= stop:
+        return
+    slice_nbytes = structure.data_type.to_numpy_dtype().itemsize * int(
+        np.prod(structure.shape[1:])
+    )
+    for block_start, block_stop in _chunk_aligned_ranges(
+        structure.chunks[0], start, stop, slice_nbytes, max_bytes
+    ):
+        block = read_array_slice(array_client, slice(block_start, block_stop))
+        for idx in range(max(block_start, start), min(block_stop, stop)):
+            yield idx, block[idx - block_start]
+
+
 class TiledDataLoader:
     def __init__(
         self,
@@ -87,19 +338,35 @@ class TiledDataLoader:
         """
         self.data_tiled_uri = data_tiled_uri
         self.data_tiled_api_key = data_tiled_api_key
-        self.refresh_data_client()
+        # Slice index of the latest prefetch per trimmed uri
+        self._latest_prefetch = {}
+        # The connection to Tiled is made on first use, not when the app is imported
+        self._data_client = None
+        self._connected = False
+        self._connect_lock = threading.Lock()
+
+    @property
+    def data_client(self):
+        if not self._connected:
+            with self._connect_lock:
+                if not self._connected:
+                    with startup_timer.step(f"connect to {self.data_tiled_uri}"):
+                        self.refresh_data_client()
+        return self._data_client
 
     def refresh_data_client(self):
         try:
-            self.data_client = from_uri(
+            self._data_client = resilient_call(
+                "tiled",
+                tiled_from_uri,
                 self.data_tiled_uri,
                 api_key=self.data_tiled_api_key,
-                timeout=httpx.Timeout(30.0),
             )
         except Exception as e:
             print(f"Error connecting to Tiled: {e}")
             traceback.print_exc()
-            self.data_client = None
+            self._data_client = None
+        self._connected = True
 
     def check_dataloader_ready(self, base_uri_only=False):
         """
@@ -110,10 +377,11 @@ class TiledDataLoader:
             if base_uri_only:
                 base_uri, _ = _split_base_uri_containers(self.data_tiled_uri)
                 try:
-                    from_uri(
+                    resilient_call(
+                        "tiled",
+                        tiled_from_uri,
                         base_uri,
                         api_key=self.data_tiled_api_key,
-                        timeout=httpx.Timeout(30.0),
                     )
                     return True
                 except Exception as e:
@@ -148,6 +416,26 @@ class TiledDataLoader:
         ]
         return project_names
 
+    def search_data_project_names(self, query, limit=None):
+        """
+        Full-text search of the metadata of the projects in the main Tiled container,
+        returning the names of matching projects that can be processed
+        """
+        if self.data_client is None or not query:
+            return []
+        items = (
+            self.data_client.search(FullText(query))
+            .items()
+            .page_size(DATA_PROJECT_PAGE_SIZE)
+        )
+        if limit is not None:
+            items = items[:limit]
+        return [
+            project
+            for project, project_client in items
+            if isinstance(project_client, (Container, ArrayClient))
+        ]
+
     def get_data_sequence_by_trimmed_uri(self, trimmed_uri):
         """
         Data sequences may be given directly inside the main client container,
@@ -203,13 +491,105 @@ class TiledDataLoader:
         """
         if slice is None:
             return self.data_client[trimmed_uri]
-        else:
-            return self.data_client[trimmed_uri][slice]
+        array_client = self.data_client[trimmed_uri]
+        if isinstance(array_client, ArrayClient):
+            return read_array_slice(array_client, slice)
+        return array_client[slice]
 
+    def get_data_sequence_slice(self, trimmed_uri, slice_idx):
+        """
+        Retrieve a single slice of the data sequence of the given trimmed uri.
+        If the chunk cache is enabled, slices are read from local disk when available.
+        Cached slices are keyed by the data uri and the array structure, such that
+        slices are fetched again if the array on the Tiled server changed shape or type.
+        """
+        sequence_client = self.get_data_sequence_by_trimmed_uri(trimmed_uri)
+        if sequence_client is None:
+            return None
+        if chunk_cache is None:
+            return read_array_slice(sequence_client, slice_idx)
 
-tiled_datasets = TiledDataLoader(
-    data_tiled_uri=DATA_TILED_URI, data_tiled_api_key=DATA_TILED_API_KEY
-)
+        cache_key = self._get_chunk_cache_key(sequence_client, slice_idx)
+        data_slice = chunk_cache.get(cache_key)
+        if data_slice is None:
+            data_slice = read_array_slice(sequence_client, slice_idx)
+            chunk_cache.put(cache_key, data_slice)
+        return data_slice
+
+    @staticmethod
+    def _get_chunk_cache_key(sequence_client, slice_idx):
+        structure = sequence_client.structure()
+        return (
+            sequence_client.uri,
+            slice_idx,
+            structure.shape,
+            structure.chunks,
+            structure.data_type.to_numpy_dtype().str,
+        )
+
+    def get_data_sequence_block(self, trimmed_uri, start, stop):
+        """
+        Retrieve slices [start, stop) of the data sequence as a list of per-slice views,
+        fetched in few chunk-aligned requests instead of one request per slice
+        """
+        sequence_client = self.get_data_sequence_by_trimmed_uri(trimmed_uri)
+        if sequence_client is None:
+            return None
+        return [
+            data_slice
+            for _, data_slice in iter_array_slices(sequence_client, start, stop)
+        ]
+
+    def prefetch_data_sequence_slices(self, trimmed_uri, slice_idx):
+        """
+        Fetches the slices around the given slice into the chunk cache in the background,
+        if the chunk cache is enabled
+        """
+        if chunk_cache is None or TILED_PREFETCH_SLICES <= 0:
+            return
+        # Only the latest prefetch per dataset is run, older ones are outdated
+        self._latest_prefetch[trimmed_uri] = slice_idx
+        _prefetch_executor.submit(self._prefetch_slices, trimmed_uri, slice_idx)
+
+    def _prefetch_slices(self, trimmed_uri, slice_idx):
+        if self._latest_prefetch.get(trimmed_uri) != slice_idx:
+            return
+        try:
+            sequence_client = self.get_data_sequence_by_trimmed_uri(trimmed_uri)
+            if sequence_client is None:
+                return
+            start = max(0, slice_idx - TILED_PREFETCH_SLICES)
+            stop = min(sequence_client.shape[0], slice_idx + TILED_PREFETCH_SLICES + 1)
+            missing_slices = [
+                idx
+                for idx in range(start, stop)
+                if not chunk_cache.contains(
+                    self._get_chunk_cache_key(sequence_client, idx)
+                )
+            ]
+            if not missing_slices:
+                return
+            for idx, data_slice in iter_array_slices(
+                sequence_client, missing_slices[0], missing_slices[-1] + 1
+            ):
+                if idx in missing_slices:
+                    chunk_cache.put(
+                        self._get_chunk_cache_key(sequence_client, idx), data_slice
+                    )
+        except Exception as e:
+            print(f"Error prefetching slices of {trimmed_uri}: {e}")
+
+
+if DATA_LOCAL_DIR:
+    tiled_datasets = LocalDataLoader(
+        DATA_LOCAL_DIR,
+        data_tiled_uri=DATA_TILED_URI,
+        data_tiled_api_key=DATA_TILED_API_KEY,
+    )
+else:
+    tiled_datasets = TiledDataLoader(
+        data_tiled_uri=DATA_TILED_URI, data_tiled_api_key=DATA_TILED_API_KEY
+    )
 
 
 class TiledMaskHandler:
@@ -224,24 +604,39 @@ class TiledMaskHandler:
     ):
         self.mask_tiled_uri = mask_tiled_uri
         self.mask_tiled_api_key = mask_tiled_api_key
+        # Resolved mask containers per (user name, trimmed uri)
+        self._dataset_containers = {}
+        self._dataset_containers_lock = threading.Lock()
+        # The connection to Tiled is made on first use, not when the app is imported
+        self._mask_client = None
+        self._connected = False
+        self._connect_lock = threading.Lock()
 
-        self.refresh_mask_handler()
+    @property
+    def mask_client(self):
+        if not self._connected:
+            with self._connect_lock:
+                if not self._connected:
+                    with startup_timer.step(f"connect to {self.mask_tiled_uri}"):
+                        self.refresh_mask_handler()
+        return self._mask_client
 
     def refresh_mask_handler(self):
+        with self._dataset_containers_lock:
+            self._dataset_containers.clear()
         base_uri, container_names = _split_base_uri_containers(self.mask_tiled_uri)
         try:
-            base_client = from_uri(
-                base_uri,
-                api_key=self.mask_tiled_api_key,
-                timeout=httpx.Timeout(30.0),
+            base_client = resilient_call(
+                "tiled", tiled_from_uri, base_uri, api_key=self.mask_tiled_api_key
             )
-            self.mask_client = _create_or_return_containers(
+            self._mask_client = _create_or_return_containers(
                 base_client, container_names
             )
         except Exception as e:
             print(f"Error connecting to Tiled: {e}")
             traceback.print_exc()
-            self.mask_client = None
+            self._mask_client = None
+        self._connected = True
 
     def check_mask_handler_ready(self):
         if self.mask_client is None:
@@ -261,6 +656,24 @@ class TiledMaskHandler:
                     annotated_slices = list(json_data["data"][0]["annotations"].keys())
         return annotated_slices
 
+    def get_dataset_container(self, trimmed_uri):
+        """
+        Returns the container for masks of the given dataset, under /username/<trimmed_uri>,
+        creating any missing containers. Resolved containers are cached per user and dataset.
+        """
+        cache_key = (USER_NAME, trimmed_uri)
+        with self._dataset_containers_lock:
+            dataset_container = self._dataset_containers.get(cache_key)
+        if dataset_container is None:
+            # This replicates the structure of the data uri under the user name
+            container_keys = [USER_NAME] + trimmed_uri.strip("/").split("/")
+            dataset_container = _create_or_return_containers(
+                self.mask_client, container_keys
+            )
+            with self._dataset_containers_lock:
+                self._dataset_containers[cache_key] = dataset_container
+        return dataset_container
+
     @staticmethod
     def DEV_load_exported_json_data(file_path, USER_NAME, PROJECT_NAME):
         """
@@ -294,9 +707,19 @@ class TiledMaskHandler:
     def DEV_filter_json_data_by_timestamp(data, timestamp):
         return [data for data in data if data["time"] == timestamp]
 
-    def save_annotations_data(self, global_store, all_annotations, trimmed_uri):
+    def save_annotations_data(
+        self,
+        global_store,
+        all_annotations,
+        trimmed_uri,
+        annotated_slices=None,
+        progress=None,
+    ):
         """
-        Transforms annotations data to a pixelated mask and outputs to the Tiled server
+        Transforms annotations data to a pixelated mask and outputs to the Tiled server.
+        If given, annotated_slices (from the annotated slices index) avoids re-deriving
+        the annotated slices from all class stores, and progress is called with a message
+        before the mask is uploaded.
         """
         if "image_shapes" in global_store:
             image_shape = global_store["image_shapes"][0]
@@ -310,7 +733,9 @@ class TiledMaskHandler:
                 return None, None, "Image shape could not be determined."
             image_shape = (data_shape[1], data_shape[2])
 
-        annotations = Annotations(all_annotations, image_shape)
+        annotations = Annotations(
+            all_annotations, image_shape, annotated_slices=annotated_slices
+        )
         # TODO: Check sparse status, it may be worthwhile to store the mask as a sparse array
         # if our machine learning models can handle sparse arrays
         annotations.create_annotation_mask(sparse=False)
@@ -337,31 +762,84 @@ class TiledMaskHandler:
         except ValueError:
             return None, None, "No annotations to process."
 
+        if progress is not None:
+            progress("Uploading mask...")
         # Store the mask in the Tiled server under /username/<trimmed_uri>/uuid/mask"
-        # This replicates the structure of the data uri under the user name
-        container_keys = [USER_NAME] + trimmed_uri.strip("/").split("/")
-        last_container = self.mask_client
-        for key in container_keys:
-            if key not in last_container.keys():
-                last_container = last_container.create_container(key=key)
-            else:
-                last_container = last_container[key]
+        last_container = self.get_dataset_container(trimmed_uri)
 
         # Add json metadata to a container with the md5 hash as key
         # if a mask with that hash does not already exist
-        if annotations_hash not in last_container.keys():
+        try:
+            last_container = last_container[annotations_hash]
+        except KeyError:
             last_container = last_container.create_container(
                 key=annotations_hash, metadata=metadata
             )
             mask = last_container.write_array(key="mask", array=mask)
-        else:
-            last_container = last_container[annotations_hash]
         return (
             last_container.uri,
             len(annotation_classes),
             "Annotations saved successfully.",
         )
 
+    def get_saved_masks(self, trimmed_uri):
+        """
+        Lists the masks the current user saved for the given dataset,
+        returning the keys of the mask containers together with their metadata
+        """
+        if self.mask_client is None or not trimmed_uri:
+            return []
+        container_path = "/".join([USER_NAME] + trimmed_uri.strip("/").split("/"))
+        try:
+            dataset_container = self.mask_client[container_path]
+        except KeyError:
+            return []
+        return [
+            (mask_key, mask_container.metadata)
+            for mask_key, mask_container in dataset_container.items()
+        ]
+
+    def load_annotations_from_mask(self, trimmed_uri, mask_key):
+        """
+        Vectorizes a saved mask into compact closed paths per class and returns the data
+        for the annotation class stores together with a message, where the data is None
+        if the mask could not be loaded. Mask slices are read from Tiled in chunk-aligned blocks.
+        """
+        if self.mask_client is None or not trimmed_uri:
+            return None, "Masks could not be retrieved from Tiled."
+        container_path = "/".join(
+            [USER_NAME] + trimmed_uri.strip("/").split("/") + [mask_key]
+        )
+        try:
+            mask_container = self.mask_client[container_path]
+            metadata = mask_container.metadata
+            mask = mask_container["mask"]
+            mask_idx = metadata["mask_idx"]
+            # Mask class ids are the condensed ids assigned on export
+            annotation_store = [
+                {
+                    "annotations": {},
+                    "color": annotation_class["color"],
+                    "label": annotation_class["label"],
+                    "is_visible": True,
+                    "class_id": int(class_id),
+                }
+                for class_id, annotation_class in metadata["classes"].items()
+            ]
+        except KeyError:
+            return None, "The mask or its metadata could not be found."
+        annotation_classes = {
+            str(annotation_class["class_id"]): annotation_class
+            for annotation_class in annotation_store
+        }
+        for mask_slice_idx, mask_slice in iter_array_slices(mask, 0, len(mask_idx)):
+            image_idx = mask_idx[mask_slice_idx]
+            slice_shapes = mask_slice_to_shapes(mask_slice)
+            for class_id, shapes in slice_shapes.items():
+                if class_id in annotation_classes:
+                    annotation_classes[class_id]["annotations"][str(image_idx)] = shapes
+        return annotation_store, "Annotations loaded successfully."
+
 
 tiled_masks = TiledMaskHandler(
     mask_tiled_uri=MASK_TILED_URI,
@@ -374,31 +852,164 @@ tiled_results = TiledDataLoader(
 )
 
 
-class Models:
+class SegmentationResultsAccessor:
+    """
+    Provides slices of segmentation results by the index of the data slice they belong to.
+    The mapping from data slices to result slices is computed once per result, and fetched
+    result slices are kept in a memory-bounded LRU cache as compact class ids, shifted by one
+    such that unlabeled pixels (-1) are stored as 0 (uint8 for up to 255 classes).
+    """
+
+    def __init__(self, results_loader, max_bytes):
+        self.results_loader = results_loader
+        self.max_bytes = max_bytes
+        # Maps from data slice index to result slice index per result trimmed uri
+        self._index_maps = {}
+        # Result slices per (result trimmed uri, result slice index), in LRU order
+        self._slices = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+
+    def _get_result_index(self, seg_result, image_idx):
+        """
+        Maps the data slice index to the index of the corresponding result slice,
+        or None if no result exists for the data slice
+        """
+        mask_idx = seg_result.get("mask_idx")
+        # If mask_idx is not given in the results,
+        # then the result stems from inference on the full data set
+        if mask_idx is None:
+            return image_idx
+        result_uri = seg_result["seg_result_trimmed_uri"]
+        with self._lock:
+            index_map = self._index_maps.get(result_uri)
+            if index_map is None:
+                index_map = {
+                    int(data_idx): result_idx
+                    for result_idx, data_idx in enumerate(mask_idx)
+                }
+                self._index_maps[result_uri] = index_map
+        return index_map.get(image_idx)
+
+    @staticmethod
+    def _to_compact_class_ids(result):
+        result = np.asarray(result)
+        if result.size and -1 <= result.min() and result.max() <= 254:
+            compact_result = np.empty(result.shape, dtype=np.uint8)
+            np.add(result, 1, out=compact_result, casting="unsafe")
+            return compact_result
+        return result.astype(np.int32) + 1
+
+    def _cache_slice(self, key, compact_result):
+        with self._lock:
+            if key in self._slices:
+                return
+            self._slices[key] = compact_result
+            self._cached_bytes += compact_result.nbytes
+            while self._cached_bytes > self.max_bytes and len(self._slices) > 1:
+                _, evicted = self._slices.popitem(last=False)
+                self._cached_bytes -= evicted.nbytes
+
+    def get_result_slice(self, seg_result, image_idx):
+        """
+        Returns the result slice for the data slice with the given index as class ids
+        shifted by one, or None if no result exists for this data slice
+        """
+        result_idx = self._get_result_index(seg_result, image_idx)
+        if result_idx is None:
+            return None
+        key = (seg_result["seg_result_trimmed_uri"], result_idx)
+        with self._lock:
+            compact_result = self._slices.get(key)
+            if compact_result is not None:
+                self._slices.move_to_end(key)
+                return compact_result
+        compact_result = self._to_compact_class_ids(
+            self.results_loader.get_data_slice_by_trimmed_uri(key[0], slice=result_idx)
+        )
+        self._cache_slice(key, compact_result)
+        return compact_result
+
+    def prefetch_result_slices(self, seg_result, image_idx):
+        """
+        Fetches the result slices around the result slice of the given data slice
+        into the cache in the background, in chunk-aligned blocks
+        """
+        if TILED_PREFETCH_SLICES <= 0:
+            return
+        result_idx = self._get_result_index(seg_result, image_idx)
+        if result_idx is not None:
+            _prefetch_executor.submit(
+                self._prefetch_slices, seg_result["seg_result_trimmed_uri"], result_idx
+            )
+
+    def _prefetch_slices(self, result_uri, result_idx):
+        try:
+            start = max(0, result_idx - TILED_PREFETCH_SLICES)
+            stop = result_idx + TILED_PREFETCH_SLICES + 1
+            with self._lock:
+                missing_slices = [
+                    idx
+                    for idx in range(start, stop)
+                    if (result_uri, idx) not in self._slices
+                ]
+            if not missing_slices:
+                return
+            result_client = self.results_loader.get_data_slice_by_trimmed_uri(
+                result_uri
+            )
+            for idx, result in iter_array_slices(
+                result_client, missing_slices[0], missing_slices[-1] + 1
+            ):
+                if idx in missing_slices:
+                    self._cache_slice(
+                        (result_uri, idx), self._to_compact_class_ids(result)
+                    )
+        except Exception as e:
+            print(f"Error prefetching result slices of {result_uri}: {e}")
+
+
+segmentation_results = SegmentationResultsAccessor(
+    tiled_results, int(RESULT_SLICE_CACHE_MB * 1024**2)
+)
+
+
+class Models(ModelRegistry):
     """
     This class loads algorithm definitions from MLflow instead of a local JSON file.
+    Definitions are loaded on first use and refreshed in the background, and are served
+    from a local snapshot while MLflow is slow or unreachable.
     """
 
     def __init__(self):
-        # Initialize MLflow client
-        self.mlflow_client = MlflowAlgorithmClient(
+        super().__init__(
+            snapshot_path=MODELS_SNAPSHOT_PATH,
+            seed_path=MODELS_SEED_PATH,
+            model_type="segmentation",
+            refresh_interval=MODELS_REFRESH_INTERVAL,
+            load_timeout=MODELS_LOAD_TIMEOUT,
+        )
+
+    def load_models(self):
+        # Imported on first use, as importing mlflow takes a large part of the boot time
+        from mlex_utils.mlflow_utils.mlflow_algorithm_client import (
+            MlflowAlgorithmClient,
+        )
+
+        mlflow_client = MlflowAlgorithmClient(
             MLFLOW_TRACKING_URI,
             MLFLOW_TRACKING_USERNAME,
             MLFLOW_TRACKING_PASSWORD,
         )
 
         # Load algorithms from MLflow filtered by type="segmentation"
-        self.mlflow_client.load_from_mlflow(algorithm_type="segmentation")
-
-        # Get list of model names
-        self.modelname_list = self.mlflow_client.modelname_list
-
-    def __getitem__(self, key):
-        """Get model by name from MLflow"""
-        try:
-            return self.mlflow_client[key]
-        except KeyError:
-            raise KeyError(f"A model with name {key} does not exist.")
+        resilient_call(
+            "mlflow", mlflow_client.load_from_mlflow, algorithm_type="segmentation"
+        )
+        return {
+            model_name: mlflow_client[model_name]
+            for model_name in mlflow_client.modelname_list
+        }
 
 
 models = Models()
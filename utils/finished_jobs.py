@@ -0,0 +1,55 @@
+import threading
+from collections import OrderedDict
+
+
+def is_completed_state(state):
+    """
+    Returns whether a Prefect flow run state is completed. Accepts a Prefect State,
+    a StateType or the name of the state type.
+    """
+    if hasattr(state, "is_completed"):
+        return state.is_completed()
+    # State.type is a StateType, whose value is the name of the type
+    state_type = getattr(state, "type", state)
+    state_type = getattr(state_type, "value", state_type)
+    return isinstance(state_type, str) and state_type.upper() == "COMPLETED"
+
+
+class FinishedJobCache:
+    """
+    Children flow ids and result metadata of completed jobs per job id, which do not change
+    anymore once a job completed, of the max_size jobs that were used last.
+    Job states are read with get_state(job_id) and children flow ids with
+    get_children(job_id).
+    """
+
+    def __init__(self, get_state, get_children, max_size=256):
+        self.get_state = get_state
+        self.get_children = get_children
+        self.max_size = max_size
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, job_id, expected_children=1):
+        """
+        Returns the entry of a completed job, holding its children flow ids, or None if the
+        job did not complete successfully (yet). Entries are only cached once all expected
+        children flows of the job were started, as children may still be started while the
+        parent flow run is being finalized.
+        """
+        with self._lock:
+            finished_job = self._jobs.get(job_id)
+            if finished_job is not None:
+                self._jobs.move_to_end(job_id)
+                return finished_job
+        # Failed or cancelled jobs have no results to show, and are not cached either as
+        # their flow runs can still be retried
+        if not is_completed_state(self.get_state(job_id)):
+            return None
+        finished_job = {"children_flows": self.get_children(job_id), "result": None}
+        if len(finished_job["children_flows"]) >= expected_children:
+            with self._lock:
+                self._jobs[job_id] = finished_job
+                while len(self._jobs) > self.max_size:
+                    self._jobs.popitem(last=False)
+        return finished_job
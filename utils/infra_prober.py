@@ -0,0 +1,102 @@
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+import pytz
+
+
+class InfraStateProber:
+    """
+    Periodically checks the state of all infrastructure components in a background thread.
+    All checks run concurrently, and a check that does not finish within the timeout
+    is reported as not ready. Callbacks only read the latest snapshot of the state,
+    which is shared by all sessions served by this process.
+    """
+
+    def __init__(self, probes, interval=60.0, timeout=5.0, timezone="US/Pacific"):
+        """
+        probes is a dictionary mapping the keys of the infra state (e.g. "tiled_data_ready")
+        to functions returning whether the component is ready
+        """
+        self.probes = probes
+        self.interval = interval
+        self.timeout = timeout
+        self.timezone = timezone
+        # One worker per probe is enough, as a probe is not resubmitted while it still hangs
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(probes), thread_name_prefix="infra-probe"
+        )
+        self._pending = {}
+        self._state = None
+        self._first_state = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """
+        Starts the background thread, if it is not running yet
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="infra-prober", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.probe()
+            except Exception:
+                traceback.print_exc()
+            time.sleep(self.interval)
+
+    def _run_probe(self, probe):
+        try:
+            return bool(probe())
+        except Exception:
+            return False
+
+    def probe(self):
+        """
+        Runs all probes concurrently and updates the snapshot of the infra state
+        """
+        futures = {}
+        for key, probe in self.probes.items():
+            pending = self._pending.pop(key, None)
+            if pending is not None and not pending.done():
+                # The previous check of this component is still hanging, wait on it instead
+                futures[key] = pending
+            else:
+                futures[key] = self._executor.submit(self._run_probe, probe)
+        wait(futures.values(), timeout=self.timeout)
+
+        infra_state = {
+            "last_checked": datetime.now(pytz.timezone(self.timezone)).strftime(
+                "%Y/%m/%d %H:%M:%S"
+            )
+        }
+        for key, future in futures.items():
+            if future.done():
+                infra_state[key] = future.result()
+            else:
+                infra_state[key] = False
+                self._pending[key] = future
+        infra_state["any_infra_down"] = not all(infra_state[key] for key in self.probes)
+        with self._lock:
+            self._state = infra_state
+        self._first_state.set()
+        return infra_state
+
+    def get_state(self):
+        """
+        Returns a copy of the latest infra state, or None if no check has completed yet.
+        The background thread is started on first use, in which case we wait for the
+        first round of checks (bounded by the probe timeout).
+        """
+        self.start()
+        self._first_state.wait(self.timeout + 1)
+        with self._lock:
+            return dict(self._state) if self._state is not None else None
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import threading
+import time
+import traceback
+
+
+class JobPoller:
+    """
+    Polls job lists (e.g. Prefect flow runs) in a background thread, and keeps the latest
+    result of each query in a cache shared by all sessions served by this process.
+    Each cached result carries a version, the digest of its content, which is the same
+    across processes, such that callbacks can skip updates when nothing changed.
+    Queries that have not been requested for idle_timeout seconds are no longer polled.
+    Changes are numbered by a sequence number, and can be waited for with wait_for_change.
+    """
+
+    def __init__(self, interval=5.0, idle_timeout=300.0):
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        # Cache entries per query key, holding the query, its latest result,
+        # the version of the result, whether the latest poll failed and the last access time
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        # Sequence number of the latest change, and the keys that changed with it
+        self._change_seq = 0
+        self._changed_keys = []
+        self._change_condition = threading.Condition()
+
+    @staticmethod
+    def get_version(data):
+        return hashlib.md5(
+            json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def start(self):
+        """
+        Starts the background thread, if it is not running yet
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="job-poller", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.poll()
+            except Exception:
+                traceback.print_exc()
+
+    def _update_entry(self, key, query):
+        """
+        Runs the query and updates the cache entry of the key with its result.
+        Returns whether the result changed.
+        """
+        try:
+            data = query()
+        except Exception:
+            with self._lock:
+                if key in self._entries:
+                    self._entries[key]["error"] = True
+            return False
+        version = self.get_version(data)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            changed = entry["version"] != version
+            entry.update(data=data, version=version, error=False)
+        return changed
+
+    def poll(self):
+        """
+        Runs all queries that were requested recently, and returns the keys
+        whose results changed
+        """
+        now = time.monotonic()
+        with self._lock:
+            for key in [
+                key
+                for key, entry in self._entries.items()
+                if now - entry["last_access"] > self.idle_timeout
+            ]:
+                del self._entries[key]
+            queries = {key: entry["query"] for key, entry in self._entries.items()}
+        changed_keys = [
+            key for key, query in queries.items() if self._update_entry(key, query)
+        ]
+        if changed_keys:
+            with self._change_condition:
+                self._change_seq += 1
+                self._changed_keys = changed_keys
+                self._change_condition.notify_all()
+        return changed_keys
+
+    def get_change_seq(self):
+        with self._change_condition:
+            return self._change_seq
+
+    def wait_for_change(self, last_seq, timeout=None):
+        """
+        Blocks until a change after the change with sequence number last_seq, or until
+        the timeout. Returns the sequence number of the latest change and the keys that
+        changed with it, which are empty if no change happened.
+        """
+        with self._change_condition:
+            self._change_condition.wait_for(
+                lambda: self._change_seq != last_seq, timeout
+            )
+            if self._change_seq == last_seq:
+                return last_seq, []
+            return self._change_seq, list(self._changed_keys)
+
+    def get(self, key, query):
+        """
+        Returns the cached result of the query with the given key as a dictionary with
+        "data", "version" and "error". The first request of a key runs the query directly,
+        later requests are served from the cache, which is refreshed in the background.
+        """
+        self.start()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["last_access"] = time.monotonic()
+                return {
+                    "data": entry["data"],
+                    "version": entry["version"],
+                    "error": entry["error"],
+                }
+            self._entries[key] = {
+                "query": query,
+                "data": [],
+                "version": None,
+                "error": False,
+                "last_access": time.monotonic(),
+            }
+        self._update_entry(key, query)
+        return self.get(key, query)
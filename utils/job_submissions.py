@@ -0,0 +1,173 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SubmissionCancelled(Exception):
+    """
+    Raised within a submission at its next step once it was cancelled
+    """
+
+
+class JobSubmissionManager:
+    """
+    Runs job submissions (e.g. exporting the annotation mask and scheduling a Prefect flow)
+    in a thread pool, such that the callback starting a submission returns right away.
+    A submission is called with a progress function as its first argument, which it calls
+    with the number and description of each step it starts, and optionally an updated
+    number of steps. The progress function raises SubmissionCancelled if the submission
+    was cancelled in the meantime.
+    Statuses are stored as JSON files in status_dir, such that every worker process sharing
+    the directory can report the progress of a submission and cancel it, no matter which
+    worker runs it. Results of submissions therefore need to be JSON serializable.
+    The status file is only written by the worker running the submission, cancellation
+    requests are separate marker files. Statuses are dropped ttl seconds after the
+    submission finished.
+    """
+
+    def __init__(self, status_dir, max_workers=4, ttl=600.0):
+        self.status_dir = status_dir
+        self.ttl = ttl
+        os.makedirs(status_dir, mode=0o700, exist_ok=True)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="job-submission"
+        )
+        # Statuses of the submissions run by this process
+        self._statuses = {}
+        self._lock = threading.Lock()
+
+    def _get_path(self, submission_id, suffix):
+        # Submission ids come from the browser, only accept the ids created by submit
+        return os.path.join(self.status_dir, f"{uuid.UUID(submission_id)}{suffix}")
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _drop_expired(self):
+        now = time.time()
+        with os.scandir(self.status_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".json"):
+                    continue
+                status = self.get_status(entry.name[: -len(".json")])
+                # Statuses of running submissions are kept, however long a step takes
+                if (
+                    status is not None
+                    and status["finished_at"] is not None
+                    and now - status["finished_at"] > self.ttl
+                ):
+                    self._remove(entry.path)
+
+    def _write_status(self, submission_id, status):
+        fd, tmp_path = tempfile.mkstemp(dir=self.status_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(status, f)
+            os.replace(tmp_path, self._get_path(submission_id, ".json"))
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+    def submit(self, func, *args, total_steps=1, **kwargs):
+        """
+        Queues func(progress, *args, **kwargs) and returns the id of the submission
+        """
+        self._drop_expired()
+        submission_id = str(uuid.uuid4())
+        status = {
+            "state": "pending",
+            "step": 0,
+            "total_steps": total_steps,
+            "message": "Waiting for submission...",
+            "result": None,
+            "error": None,
+            "finished_at": None,
+        }
+        with self._lock:
+            self._statuses[submission_id] = status
+            self._write_status(submission_id, status)
+        self._executor.submit(self._run, submission_id, func, args, kwargs)
+        return submission_id
+
+    def _update(self, submission_id, **kwargs):
+        with self._lock:
+            status = self._statuses[submission_id]
+            status.update(kwargs)
+            self._write_status(submission_id, status)
+
+    def _is_cancel_requested(self, submission_id):
+        return os.path.exists(self._get_path(submission_id, ".cancel"))
+
+    def _run(self, submission_id, func, args, kwargs):
+        def progress(step, message, total_steps=None):
+            update = {"step": step, "message": message}
+            if total_steps is not None:
+                update["total_steps"] = total_steps
+            self._update(submission_id, **update)
+            if self._is_cancel_requested(submission_id):
+                raise SubmissionCancelled()
+
+        try:
+            progress(0, "Starting submission...")
+            self._update(submission_id, state="running")
+            result = func(progress, *args, **kwargs)
+        except SubmissionCancelled:
+            self._update(
+                submission_id,
+                state="cancelled",
+                message="Submission was cancelled.",
+                finished_at=time.time(),
+            )
+        except Exception as e:
+            traceback.print_exc()
+            self._update(
+                submission_id, state="failed", error=str(e), finished_at=time.time()
+            )
+        else:
+            try:
+                self._update(
+                    submission_id, state="done", result=result, finished_at=time.time()
+                )
+            except Exception as e:
+                # The result could not be stored, as it is not JSON serializable
+                traceback.print_exc()
+                self._update(
+                    submission_id,
+                    state="failed",
+                    result=None,
+                    error=str(e),
+                    finished_at=time.time(),
+                )
+        finally:
+            with self._lock:
+                self._statuses.pop(submission_id, None)
+            self._remove(self._get_path(submission_id, ".cancel"))
+
+    def get_status(self, submission_id):
+        """
+        Returns the status of the submission, or None if it is not known
+        """
+        try:
+            with open(self._get_path(submission_id, ".json"), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def cancel(self, submission_id):
+        """
+        Requests the submission to stop at its next step. Returns whether the submission
+        was still pending or running.
+        """
+        status = self.get_status(submission_id)
+        if status is None or status["finished_at"] is not None:
+            return False
+        open(self._get_path(submission_id, ".cancel"), "w").close()
+        return True
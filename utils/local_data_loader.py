@@ -0,0 +1,298 @@
+import importlib.util
+import threading
+import traceback
+from pathlib import Path
+from urllib.parse import urlparse, urlunparse
+
+import numpy as np
+import tifffile
+
+# HDF5 and Zarr support is optional, and only enabled if the packages are installed
+if importlib.util.find_spec("h5py") is not None:
+    import h5py
+else:
+    h5py = None
+if importlib.util.find_spec("zarr") is not None:
+    import zarr
+else:
+    zarr = None
+
+HDF5_EXTENSIONS = (".h5", ".hdf5", ".hdf", ".nxs")
+ZARR_EXTENSIONS = (".zarr",)
+TIFF_EXTENSIONS = (".tif", ".tiff")
+FILE_EXTENSIONS = HDF5_EXTENSIONS + ZARR_EXTENSIONS + TIFF_EXTENSIONS
+
+
+class TiffSequence:
+    """
+    Stack of single-image TIFF files in a directory, read one memory-mapped file per slice
+    """
+
+    def __init__(self, paths):
+        self.paths = sorted(paths)
+        first_slice = _open_tiff(self.paths[0])
+        self.shape = (len(self.paths),) + first_slice.shape
+        self.dtype = first_slice.dtype
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)):
+            return _open_tiff(self.paths[idx])
+        return np.stack([_open_tiff(path) for path in self.paths[idx]])
+
+
+def _open_tiff(path):
+    """
+    Memory maps the TIFF file if its image data is stored uncompressed and contiguously,
+    and reads it into memory otherwise
+    """
+    try:
+        return tifffile.memmap(path, mode="r")
+    except ValueError:
+        return tifffile.imread(path)
+
+
+def _memmap_hdf5_dataset(path, dataset):
+    """
+    Memory maps an HDF5 dataset if it is stored contiguously and uncompressed,
+    such that slicing does not copy data. Returns the dataset itself otherwise.
+    """
+    if dataset.chunks is not None or dataset.compression is not None:
+        return dataset
+    offset = dataset.id.get_offset()
+    if offset is None or dataset.dtype.hasobject:
+        return dataset
+    return np.memmap(
+        path, dtype=dataset.dtype, mode="r", offset=offset, shape=dataset.shape
+    )
+
+
+class LocalDataLoader:
+    """
+    Reads data sequences (HDF5, Zarr, TIFF files or directories of TIFF files) directly from
+    a local directory, with the same interface as TiledDataLoader.
+    Trimmed uris are paths relative to the data directory, where file extensions may be
+    omitted, following the keys of `tiled serve directory`. Path pieces after an HDF5 file
+    or Zarr store address a dataset within it.
+    """
+
+    def __init__(self, data_dir, data_tiled_uri=None, data_tiled_api_key=None):
+        """
+        If the data directory is also served by Tiled under data_tiled_uri,
+        data uris passed to the segmentation jobs point to the Tiled server.
+        """
+        self.data_dir = Path(data_dir)
+        self.data_tiled_uri = data_tiled_uri
+        self.data_tiled_api_key = data_tiled_api_key
+        # Opened data sequences per trimmed uri
+        self._sequences = {}
+        self._lock = threading.Lock()
+        self.refresh_data_client()
+
+    def refresh_data_client(self):
+        with self._lock:
+            self._sequences.clear()
+        self.data_client = self.data_dir if self.data_dir.is_dir() else None
+        if self.data_client is None:
+            print(f"Data directory {self.data_dir} does not exist.")
+
+    def check_dataloader_ready(self, base_uri_only=False):
+        if self.data_client is None:
+            self.refresh_data_client()
+        return self.data_client is not None
+
+    def get_base_uri_initial_path(self):
+        """
+        Get the base uri of the Tiled server serving the data directory, if any,
+        and the path to the root container
+        """
+        if self.data_tiled_uri is None:
+            return None, ""
+        parsed_url = urlparse(self.data_tiled_uri)
+        base_path, _, root_path = parsed_url.path.partition("/metadata")
+        return urlunparse(parsed_url._replace(path=base_path)), root_path.strip("/")
+
+    def get_data_project_names(self):
+        """
+        Get the files and directories in the data directory that can be read,
+        without their extensions
+        """
+        if self.data_client is None:
+            return []
+        project_names = []
+        for entry in sorted(self.data_dir.iterdir()):
+            if entry.suffix.lower() in HDF5_EXTENSIONS + ZARR_EXTENSIONS:
+                project_names.append(entry.stem)
+            elif entry.suffix.lower() in TIFF_EXTENSIONS or entry.is_dir():
+                project_names.append(entry.stem if entry.is_file() else entry.name)
+        return project_names
+
+    def search_data_project_names(self, query, limit=None):
+        """
+        Get the projects in the data directory whose names contain the query,
+        as there is no metadata to search
+        """
+        if not query:
+            return []
+        project_names = [
+            project_name
+            for project_name in self.get_data_project_names()
+            if query.lower() in project_name.lower()
+        ]
+        return project_names[:limit]
+
+    def _resolve_path(self, trimmed_uri):
+        """
+        Splits the trimmed uri into the path of a file or directory in the data directory
+        and the remaining path within that file. Paths outside of the data directory
+        (e.g. through ".." or symbolic links) are not resolved.
+        """
+        data_dir = self.data_dir.resolve()
+        path = self.data_dir
+        pieces = trimmed_uri.strip("/").split("/")
+        for idx, piece in enumerate(pieces):
+            candidates = [path / piece] + [
+                path / (piece + extension) for extension in FILE_EXTENSIONS
+            ]
+            path = next(
+                (
+                    c
+                    for c in candidates
+                    if c.exists() and c.resolve().is_relative_to(data_dir)
+                ),
+                None,
+            )
+            if path is None:
+                return None, None
+            if path.suffix.lower() in FILE_EXTENSIONS:
+                return path, "/".join(pieces[idx + 1 :])
+        return path, ""
+
+    def _open_sequence(self, path, internal_path):
+        """
+        Opens the data sequence at the internal path of the file, or the array Tiled would
+        serve for the file if no internal path is given. Returns the sequence and the
+        internal path of the array that was opened.
+        """
+        suffix = path.suffix.lower()
+        if suffix in TIFF_EXTENSIONS:
+            return _open_tiff(path), ""
+        if suffix in HDF5_EXTENSIONS:
+            if h5py is None:
+                print("HDF5 files can only be read if h5py is installed.")
+                return None, internal_path
+            node = h5py.File(path, "r")
+        elif suffix in ZARR_EXTENSIONS:
+            if zarr is None:
+                print("Zarr stores can only be read if zarr is installed.")
+                return None, internal_path
+            node = zarr.open(str(path), mode="r")
+        elif path.is_dir():
+            tiff_paths = [
+                p for p in path.iterdir() if p.suffix.lower() in TIFF_EXTENSIONS
+            ]
+            return (TiffSequence(tiff_paths) if tiff_paths else None), ""
+        else:
+            return None, internal_path
+
+        if internal_path:
+            node = node[internal_path]
+        elif not hasattr(node, "shape"):
+            if "entry/data/data" in node:
+                # Nexus files following the NXtomoproc definition
+                internal_path = "entry/data/data"
+                node = node[internal_path]
+            elif len(node) == 1:
+                # Enter the group and use its only element, if it represents an array
+                internal_path = next(iter(node.keys()))
+                node = node[internal_path]
+        if not hasattr(node, "shape"):
+            return None, internal_path
+        if h5py is not None and isinstance(node, h5py.Dataset):
+            return _memmap_hdf5_dataset(path, node), internal_path
+        return node, internal_path
+
+    def _get_sequence(self, trimmed_uri):
+        """
+        Returns the opened data sequence of the trimmed uri and the path of the data file,
+        together with the internal path of the sequence within the file
+        """
+        with self._lock:
+            if trimmed_uri in self._sequences:
+                return self._sequences[trimmed_uri]
+        path, internal_path = self._resolve_path(trimmed_uri)
+        if path is None:
+            return None, None, None
+        try:
+            sequence, internal_path = self._open_sequence(path, internal_path)
+        except Exception as e:
+            print(f"Error reading {path}: {e}")
+            traceback.print_exc()
+            return None, path, internal_path
+        with self._lock:
+            self._sequences[trimmed_uri] = (sequence, path, internal_path)
+        return sequence, path, internal_path
+
+    def get_data_sequence_by_trimmed_uri(self, trimmed_uri):
+        """
+        Returns an array-like object for the data sequence of the trimmed uri,
+        memory-mapped where the file format allows it
+        """
+        if self.data_client is None or trimmed_uri is None:
+            return None
+        return self._get_sequence(trimmed_uri)[0]
+
+    def get_data_shape_by_trimmed_uri(self, trimmed_uri):
+        sequence = self.get_data_sequence_by_trimmed_uri(trimmed_uri)
+        if sequence is not None:
+            return sequence.shape
+        return None
+
+    def get_data_uri_by_trimmed_uri(self, trimmed_uri):
+        """
+        Returns the Tiled uri of the data if the data directory is served by Tiled,
+        and the file uri otherwise. Both point to the array that is read, e.g. the
+        dataset within an HDF5 file, like the uris returned by TiledDataLoader.
+        """
+        _, path, internal_path = self._get_sequence(trimmed_uri)
+        if path is None:
+            return None
+        if self.data_tiled_uri is not None:
+            # Tiled keys are the path within the data directory without file extensions
+            relative_path = path.relative_to(self.data_dir)
+            if path.suffix.lower() in FILE_EXTENSIONS:
+                relative_path = relative_path.with_suffix("")
+            pieces = [self.data_tiled_uri.rstrip("/"), relative_path.as_posix()]
+            return "/".join(pieces + ([internal_path] if internal_path else []))
+        uri = path.resolve().as_uri()
+        return f"{uri}#{internal_path}" if internal_path else uri
+
+    def get_data_slice_by_trimmed_uri(self, trimmed_uri, slice=None):
+        sequence = self.get_data_sequence_by_trimmed_uri(trimmed_uri)
+        if slice is None:
+            return sequence
+        return sequence[slice]
+
+    def get_data_sequence_slice(self, trimmed_uri, slice_idx):
+        """
+        Retrieve a single slice of the data sequence, without copying for memory-mapped data
+        """
+        sequence = self.get_data_sequence_by_trimmed_uri(trimmed_uri)
+        if sequence is None:
+            return None
+        return np.asarray(sequence[slice_idx])
+
+    def get_data_sequence_block(self, trimmed_uri, start, stop):
+        """
+        Retrieve slices [start, stop) of the data sequence as a list of per-slice views
+        """
+        sequence = self.get_data_sequence_by_trimmed_uri(trimmed_uri)
+        if sequence is None:
+            return None
+        block = np.asarray(sequence[start:stop])
+        return list(block)
+
+    def prefetch_data_sequence_slices(self, trimmed_uri, slice_idx):
+        """
+        Local data is read from disk on demand, so there is nothing to prefetch
+        """
+        return
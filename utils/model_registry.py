@@ -0,0 +1,160 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import traceback
+from abc import ABC, abstractmethod
+
+
+def _read_models_file(path, model_type=None):
+    """
+    Reads model definitions from a JSON file, either a snapshot written by ModelRegistry
+    or an algorithm file such as assets/models.json, with a "contents" list of definitions.
+    Returns a dictionary of definitions per model name, or None if the file does not exist.
+    """
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    if isinstance(data, dict) and "contents" in data:
+        data = data["contents"]
+    if isinstance(data, list):
+        data = {definition["model_name"]: definition for definition in data}
+    return {
+        model_name: definition
+        for model_name, definition in data.items()
+        if model_type is None or definition.get("type", model_type) == model_type
+    }
+
+
+class ModelRegistry(ABC):
+    """
+    Registry of model definitions, which are loaded lazily on first access and refreshed
+    in a background thread every refresh_interval seconds.
+    Until the first refresh succeeds, definitions are served from a snapshot on local disk,
+    which is written after every successful refresh and seeded from seed_path, such that
+    neither starting the app nor rendering its layout waits for the model source.
+    Only if there is no snapshot at all, the first access waits up to load_timeout
+    seconds for the first refresh.
+    Subclasses implement load_models, which returns the definitions per model name.
+    """
+
+    def __init__(
+        self,
+        snapshot_path,
+        seed_path=None,
+        model_type=None,
+        refresh_interval=300.0,
+        load_timeout=5.0,
+    ):
+        self.snapshot_path = snapshot_path
+        self.seed_path = seed_path
+        self.model_type = model_type
+        self.refresh_interval = refresh_interval
+        self.load_timeout = load_timeout
+        self._models = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._first_refresh = threading.Event()
+
+    @abstractmethod
+    def load_models(self):
+        """
+        Loads the model definitions from their source, and returns them per model name
+        """
+
+    def _read_snapshot(self):
+        for path in (self.snapshot_path, self.seed_path):
+            if path is None:
+                continue
+            try:
+                models = _read_models_file(path, self.model_type)
+            except Exception:
+                traceback.print_exc()
+                continue
+            if models is not None:
+                return models
+        return None
+
+    def _write_snapshot(self, models):
+        snapshot_dir = os.path.dirname(os.path.abspath(self.snapshot_path))
+        os.makedirs(snapshot_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=snapshot_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(models, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception:
+            traceback.print_exc()
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+
+    def refresh(self):
+        """
+        Loads the model definitions from their source, and returns whether this succeeded.
+        An empty result is not applied if definitions were loaded before, as it usually
+        means that the source could not be reached.
+        """
+        try:
+            models = self.load_models()
+        except Exception as e:
+            print(f"Error loading models: {e}")
+            return False
+        with self._lock:
+            if not models and self._models:
+                print("No models were loaded, keeping the previous model definitions.")
+                return False
+            self._models = models
+        self._write_snapshot(models)
+        return True
+
+    def _run(self):
+        while True:
+            self.refresh()
+            self._first_refresh.set()
+            time.sleep(self.refresh_interval)
+
+    def start(self):
+        """
+        Starts the background refresh, if it is not running yet
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="model-registry", daemon=True
+            )
+            self._thread.start()
+
+    def get_models(self):
+        """
+        Returns the current model definitions per model name, without waiting for
+        the model source unless no definitions are available at all
+        """
+        with self._lock:
+            models = self._models
+        if models is not None:
+            return models
+        snapshot = self._read_snapshot()
+        with self._lock:
+            if self._models is None and snapshot is not None:
+                self._models = snapshot
+        self.start()
+        if snapshot is None:
+            self._first_refresh.wait(self.load_timeout)
+        with self._lock:
+            return self._models or {}
+
+    @property
+    def modelname_list(self):
+        return list(self.get_models())
+
+    def __getitem__(self, key):
+        try:
+            return self.get_models()[key]
+        except KeyError:
+            raise KeyError(f"A model with name {key} does not exist.")
@@ -1,4 +1,5 @@
 import random
+import threading
 
 import dash_mantine_components as dmc
 import numpy as np
@@ -20,6 +21,90 @@ def blank_fig():
     return fig
 
 
+# Per-thread float32 scratch buffer for normalization,
+# reused across renders of equally shaped slices
+_normalization_scratch = threading.local()
+
+
+def _get_scratch_buffer(shape):
+    buffer = getattr(_normalization_scratch, "buffer", None)
+    if buffer is None or buffer.shape != shape:
+        buffer = np.empty(shape, dtype=np.float32)
+        _normalization_scratch.buffer = buffer
+    return buffer
+
+
+def _uses_lookup_table(image):
+    return image.dtype.kind in "ui" and image.dtype.itemsize <= 2
+
+
+def get_intensity_percentiles(image, low_percentile=1, high_percentile=99):
+    """
+    Returns the given percentiles of the image intensities, with linear interpolation
+    like np.percentile. For integer images of up to 16 bits, the percentiles are read
+    from the histogram of the image in linear time instead of partially sorting a copy.
+    """
+    if not _uses_lookup_table(image):
+        low, high = np.percentile(image, [low_percentile, high_percentile])
+        return float(low), float(high)
+
+    # Count values through an unsigned view, and reorder the counts of signed images
+    # such that index k corresponds to the value k + min value of the dtype
+    unsigned_image = image.view(f"u{image.dtype.itemsize}")
+    counts = np.bincount(
+        unsigned_image.ravel(), minlength=2 ** (8 * image.dtype.itemsize)
+    )
+    min_value = int(np.iinfo(image.dtype).min)
+    counts = np.roll(counts, -min_value)
+    cumulative_counts = np.cumsum(counts)
+    percentiles = []
+    for percentile in (low_percentile, high_percentile):
+        rank = percentile / 100 * (image.size - 1)
+        lower = np.searchsorted(cumulative_counts, np.floor(rank), side="right")
+        upper = np.searchsorted(cumulative_counts, np.ceil(rank), side="right")
+        percentiles.append(
+            float(lower + (rank - np.floor(rank)) * (upper - lower) + min_value)
+        )
+    return tuple(percentiles)
+
+
+def _scale_to_uint8(buffer, scale):
+    """
+    Scales an offset float32 buffer in place, and returns it rounded and clipped as uint8
+    """
+    np.multiply(buffer, scale, out=buffer)
+    np.add(buffer, 0.5, out=buffer)
+    np.clip(buffer, 0, 255, out=buffer)
+    return buffer.astype(np.uint8)
+
+
+def normalize_to_uint8(image, low_percentile=1, high_percentile=99):
+    """
+    Maps the intensities of the image to uint8, clipping them to the given percentiles.
+    This corresponds to np.clip((image - low) / (high - low), 0, 1) * 255, but without
+    promoting the image to float64 and allocating full-size temporaries: integer images
+    of up to 16 bits are mapped through a lookup table, and other images are scaled
+    in a reused float32 scratch buffer.
+    """
+    image = np.asarray(image)
+    low, high = get_intensity_percentiles(image, low_percentile, high_percentile)
+    scale = 255 / (high - low) if high > low else 0.0
+    if _uses_lookup_table(image):
+        unsigned_image = image.view(f"u{image.dtype.itemsize}")
+        # Table entry i holds the normalized value of the intensity with bit pattern i
+        lookup_table = (
+            np.arange(2 ** (8 * image.dtype.itemsize), dtype=unsigned_image.dtype)
+            .view(image.dtype)
+            .astype(np.float32)
+        )
+        np.subtract(lookup_table, low, out=lookup_table)
+        lookup_table = _scale_to_uint8(lookup_table, scale)
+        return lookup_table[unsigned_image]
+    buffer = _get_scratch_buffer(image.shape)
+    np.subtract(image, low, out=buffer, casting="unsafe")
+    return _scale_to_uint8(buffer, scale)
+
+
 def downscale_view(
     x0_original,
     y0_original,
@@ -0,0 +1,171 @@
+import os
+import threading
+import time
+
+import httpx
+from tenacity import (
+    Retrying,
+    retry_if_exception,
+    stop_after_attempt,
+    stop_after_delay,
+    wait_exponential_jitter,
+)
+
+# Bounded exponential backoff for calls to backend services
+RETRY_ATTEMPTS = int(os.getenv("BACKEND_RETRY_ATTEMPTS", 3))
+RETRY_INITIAL_WAIT = float(os.getenv("BACKEND_RETRY_INITIAL_WAIT", 0.5))
+RETRY_MAX_WAIT = float(os.getenv("BACKEND_RETRY_MAX_WAIT", 4.0))
+RETRY_MAX_DELAY = float(os.getenv("BACKEND_RETRY_MAX_DELAY", 10.0))
+# Consecutive failures after which a circuit opens, and seconds until it is tried again
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 3))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", 30.0))
+
+# Exceptions raised for requests that reached the service, which are neither retried
+# nor counted as failures of the service (e.g. KeyError for a missing Tiled node)
+NON_FAILURE_EXCEPTIONS = (KeyError, ValueError, TypeError)
+
+
+def is_service_failure(exception):
+    """
+    Returns whether the exception indicates that the service is failing, as opposed to
+    errors of the request itself, such as a missing node or a client error (HTTP 4xx)
+    """
+    if isinstance(exception, NON_FAILURE_EXCEPTIONS):
+        return False
+    if isinstance(exception, httpx.HTTPStatusError):
+        return not 400 <= exception.response.status_code < 500
+    return True
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a service while its circuit is open
+    """
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for calls to one backend service.
+    After failure_threshold consecutive failures, the circuit opens and calls fail fast
+    with CircuitOpenError. After reset_timeout seconds, the circuit is half-open,
+    and a single trial call is let through: the circuit closes if it succeeds,
+    and opens again otherwise.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        name,
+        failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout=CIRCUIT_RESET_TIMEOUT,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+        self.metrics = {
+            "calls": 0,
+            "failures": 0,
+            "rejected_calls": 0,
+            "times_opened": 0,
+        }
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.metrics["rejected_calls"] += 1
+                    raise CircuitOpenError(f"{self.name} is currently unavailable.")
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_progress:
+                    self.metrics["rejected_calls"] += 1
+                    raise CircuitOpenError(f"{self.name} is currently unavailable.")
+                self._trial_in_progress = True
+            self.metrics["calls"] += 1
+
+    def _record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._trial_in_progress = False
+
+    def _record_failure(self):
+        with self._lock:
+            self.metrics["failures"] += 1
+            self.consecutive_failures += 1
+            self._trial_in_progress = False
+            if (
+                self.state == self.HALF_OPEN
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                if self.state != self.OPEN:
+                    self.metrics["times_opened"] += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def call(self, func, *args, **kwargs):
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_service_failure(e):
+                self._record_failure()
+            else:
+                self._record_success()
+            raise
+        self._record_success()
+        return result
+
+    def get_metrics(self):
+        with self._lock:
+            state = self.state
+            if state == self.OPEN and (
+                time.monotonic() - self.opened_at >= self.reset_timeout
+            ):
+                state = self.HALF_OPEN
+            return {
+                "state": state,
+                "consecutive_failures": self.consecutive_failures,
+                **self.metrics,
+            }
+
+
+circuit_breakers = {
+    service: CircuitBreaker(service) for service in ("tiled", "prefect", "mlflow")
+}
+
+
+def resilient_call(service, func, *args, **kwargs):
+    """
+    Calls func through the circuit breaker of the given service ("tiled", "prefect" or
+    "mlflow"), retrying failed calls with bounded exponential backoff.
+    The retries of one call count as a single failure of the service, such that one
+    failing call does not open the circuit on its own.
+    Raises CircuitOpenError without calling func while the service is considered down.
+    """
+    circuit_breaker = circuit_breakers[service]
+    retrying = Retrying(
+        retry=retry_if_exception(is_service_failure),
+        stop=stop_after_attempt(RETRY_ATTEMPTS) | stop_after_delay(RETRY_MAX_DELAY),
+        wait=wait_exponential_jitter(initial=RETRY_INITIAL_WAIT, max=RETRY_MAX_WAIT),
+        reraise=True,
+    )
+    return circuit_breaker.call(retrying, func, *args, **kwargs)
+
+
+def get_circuit_breaker_metrics():
+    """
+    Returns the state and call metrics of the circuit breakers of all services
+    """
+    return {
+        service: circuit_breaker.get_metrics()
+        for service, circuit_breaker in circuit_breakers.items()
+    }
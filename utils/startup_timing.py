@@ -0,0 +1,44 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """
+    Records how long the steps of starting the app take (e.g. importing the callbacks,
+    building the layout, connecting to a backend on first use), such that the boot time
+    of each worker process can be broken down.
+    """
+
+    def __init__(self):
+        self.steps = []
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.steps.append({"name": name, "seconds": round(seconds, 4)})
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def get_report(self):
+        with self._lock:
+            steps = list(self.steps)
+        return {
+            "steps": steps,
+            "total_seconds": round(sum(step["seconds"] for step in steps), 4),
+        }
+
+    def print_report(self):
+        report = self.get_report()
+        print(f"Startup took {report['total_seconds']:.2f}s:")
+        for step in report["steps"]:
+            print(f"  {step['seconds']:8.3f}s  {step['name']}")
+
+
+startup_timer = StartupTimer()